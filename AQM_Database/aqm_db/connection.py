@@ -1,38 +1,89 @@
+import socket
+
 import redis
 from AQM_Database.aqm_shared import errors, config
 from AQM_Database.aqm_shared.types import HealthStatus
 
 
-def create_vault_client() -> redis.Redis:
-    r = redis.Redis(
+# TCP_KEEPIDLE is Linux-only; elsewhere fall back to the OS keepalive timers.
+# redis-py already sets TCP_NODELAY on every connection it opens.
+_KEEPALIVE_OPTIONS = (
+    {socket.TCP_KEEPIDLE: config.REDIS_KEEPALIVE_IDLE}
+    if hasattr(socket, "TCP_KEEPIDLE") else {}
+)
+
+
+# One shared pool per logical DB for the whole process. A pooled connection
+# is bound to its DB at handshake, so vault and inventory cannot share one
+# pool; every client for the same DB (e.g. both chat sessions) does.
+_SHARED_POOLS: dict[int, redis.BlockingConnectionPool] = {}
+
+
+def _create_pool(db: int, client_name: str) -> redis.BlockingConnectionPool:
+    # Responses stay raw bytes: vault and inventory values are binary blobs,
+    # and redis-py hands RESP parsing to hiredis when it is installed.
+    # Blocking: a burst beyond max_connections waits instead of erroring.
+    return redis.BlockingConnectionPool(
         host=config.REDIS_HOST,
         port=config.REDIS_PORT,
-        db=config.REDIS_VAULT_DB,
+        db=db,
+        client_name=client_name,
+        max_connections=config.REDIS_POOL_SIZE,
+        timeout=config.REDIS_POOL_TIMEOUT,
         decode_responses=False,
-        socket_connect_timeout=config.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=config.REDIS_CONNECT_TIMEOUT,
         socket_timeout=config.REDIS_SOCKET_TIMEOUT,
+        socket_keepalive=True,
+        socket_keepalive_options=_KEEPALIVE_OPTIONS,
     )
+
+
+def _prewarm(pool: redis.ConnectionPool, count: int) -> None:
+    """Open and PING `count` pooled connections so first requests skip the handshake."""
+    conns = []
+    try:
+        for _ in range(count):
+            conn = pool.get_connection()
+            conns.append(conn)
+            conn.send_command("PING")
+            conn.read_response()
+    finally:
+        for conn in conns:
+            pool.release(conn)
+
+
+def _shared_pool(db: int, client_name: str) -> redis.BlockingConnectionPool:
+    """Return the process-wide pool for `db`, creating and prewarming it once.
+
+    Raises redis ConnectionError if Redis is unreachable; the pool is only
+    cached once prewarming succeeds, so a later call retries the connect.
+    """
+    pool = _SHARED_POOLS.get(db)
+    if pool is None:
+        pool = _create_pool(db, client_name)
+        try:
+            _prewarm(pool, config.REDIS_POOL_PREWARM)
+        except redis.exceptions.ConnectionError:
+            pool.disconnect()
+            raise
+        _SHARED_POOLS[db] = pool
+    return pool
+
+
+def create_vault_client() -> redis.Redis:
     try:
-        r.ping()
+        pool = _shared_pool(config.REDIS_VAULT_DB, config.REDIS_VAULT_NAME)
     except redis.exceptions.ConnectionError:
         raise errors.VaultUnavailableError(f"Cannot connect to Redis at {config.REDIS_HOST}:{config.REDIS_PORT}")
-    return r
+    return redis.Redis(connection_pool=pool)
 
 
 def create_inventory_client() -> redis.Redis:
-    r = redis.Redis(
-        host=config.REDIS_HOST,
-        port=config.REDIS_PORT,
-        db=config.REDIS_INVENTORY_DB,
-        decode_responses=False,
-        socket_connect_timeout=config.REDIS_SOCKET_TIMEOUT,
-        socket_timeout=config.REDIS_SOCKET_TIMEOUT,
-    )
     try:
-        r.ping()
+        pool = _shared_pool(config.REDIS_INVENTORY_DB, config.REDIS_INVENTORY_NAME)
     except redis.exceptions.ConnectionError:
         raise errors.InventoryUnavailableError(f"Cannot connect to Redis at {config.REDIS_HOST}:{config.REDIS_PORT}")
-    return r
+    return redis.Redis(connection_pool=pool)
 
 
 def health_check(vault_client, inventory_client) -> HealthStatus:
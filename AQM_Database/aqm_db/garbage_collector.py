@@ -3,7 +3,7 @@ import time
 import redis
 
 from AQM_Database.aqm_shared import errors, config
-from AQM_Database.aqm_db.inventory import SmartInventory
+from AQM_Database.aqm_db.inventory import SmartInventory, META_SCAN_PATTERN, contact_id_from_meta_key
 from AQM_Database.aqm_shared.types import GCResult
 
 
@@ -19,7 +19,7 @@ class GarbageCollector:
     def _delete_all_keys_for_contact(self, contact_id: str) -> int:
         deleted = 0
 
-        for tier in ("GOLD", "SILVER", "BRONZE"):
+        for tier in config.TIER_ORDER:
             idx_key = self.inventory._idx_key(contact_id, tier)
             key_ids = self.db.zrange(idx_key, 0, -1)
 
@@ -36,21 +36,39 @@ class GarbageCollector:
 
         return deleted
 
+    def _prune_contact_index(self) -> int:
+        """SREM contacts whose meta hash is gone from INV_CONTACTS_KEY."""
+        contact_ids = [cid.decode() for cid in self.db.sscan_iter(config.INV_CONTACTS_KEY, count=100)]
+        if not contact_ids:
+            return 0
+
+        pipe = self.db.pipeline(transaction=False)
+        for contact_id in contact_ids:
+            pipe.exists(self.inventory._meta_key(contact_id))
+        stale = [cid for cid, exists in zip(contact_ids, pipe.execute()) if not exists]
+        if stale:
+            self.db.srem(config.INV_CONTACTS_KEY, *stale)
+        return len(stale)
+
     def garbage_collect(self, inactive_days: int = 30) -> GCResult:
         contacts_cleaned = 0
         keys_deleted = 0
         bytes_freed = 0
 
         try:
+            # Publish this process's buffered activity before judging it
+            self.inventory.flush()
+            self.inventory.migrate_legacy_keys()
             cursor = 0
             while True:
-                cursor, meta_keys = self.db.scan(cursor=cursor, match=f"{config.INV_META_PREFIX}:*", count=100)
+                cursor, meta_keys = self.db.scan(cursor=cursor, match=META_SCAN_PATTERN, count=100)
 
                 for meta_key in meta_keys:
-                    contact_id = meta_key.decode().split(":")[-1]
+                    contact_id = contact_id_from_meta_key(meta_key)
                     meta = self.inventory.get_contact_meta(contact_id)
 
                     if meta is None:
+                        self.db.srem(config.INV_CONTACTS_KEY, contact_id)
                         continue
 
                     if not self._is_inactive(meta.last_msg_at, inactive_days):
@@ -69,6 +87,8 @@ class GarbageCollector:
                 if cursor == 0:
                     break
 
+            self._prune_contact_index()
+
             return GCResult(
                 contacts_cleaned=contacts_cleaned,
                 keys_deleted=keys_deleted,
@@ -80,8 +100,10 @@ class GarbageCollector:
 
     def collect_single_contact(self, contact_id: str) -> GCResult:
         try:
+            self.inventory.flush()
             meta = self.inventory.get_contact_meta(contact_id)
             if meta is None:
+                self.db.srem(config.INV_CONTACTS_KEY, contact_id)
                 raise errors.ContactNotRegisteredError(contact_id)
 
             summary = self.inventory.get_inventory(contact_id)
@@ -109,12 +131,14 @@ class GarbageCollector:
             keys_deleted = 0
             bytes_freed = 0
             cursor = 0
+            self.inventory.flush()
+            self.inventory.migrate_legacy_keys()
 
             while True:
-                cursor, meta_keys = self.db.scan(cursor=cursor, match=f"{config.INV_META_PREFIX}:*", count=100)
+                cursor, meta_keys = self.db.scan(cursor=cursor, match=META_SCAN_PATTERN, count=100)
 
                 for meta_key in meta_keys:
-                    contact_id = meta_key.decode().split(":")[-1]
+                    contact_id = contact_id_from_meta_key(meta_key)
                     meta = self.inventory.get_contact_meta(contact_id)
 
                     if meta is None:
@@ -1,24 +1,139 @@
+import functools
+import logging
+import struct
+import threading
 import time
 from typing import Optional
 
 import redis
 
 from AQM_Database.aqm_shared import errors, config
-from AQM_Database.aqm_shared.types import ContactMeta, InventoryEntry, InventorySummary
+from AQM_Database.aqm_shared.types import ContactMeta, ContactState, InventoryEntry, InventorySummary
+
+logger = logging.getLogger(__name__)
+
+# Key builders are cached per contact and pre-encoded so the hot paths
+# skip both the f-string and redis-py's str -> bytes encode on each call.
+# contact_id is emitted as a {hash tag} so per-contact keys share a slot.
+
+@functools.lru_cache(maxsize=8192)
+def _meta_key_bytes(contact_id: str) -> bytes:
+    return f"{config.INV_META_PREFIX}:{{{contact_id}}}".encode()
+
+
+@functools.lru_cache(maxsize=8192)
+def _idx_key_bytes(contact_id: str, coin_category: str) -> bytes:
+    return f"{config.INV_IDX_PREFIX}:{{{contact_id}}}:{coin_category}".encode()
+
+
+@functools.lru_cache(maxsize=8192)
+def _inv_key_prefix(contact_id: str) -> bytes:
+    return f"{config.INV_KEY_PREFIX}:{{{contact_id}}}:".encode()
+
+
+_META_KEY_PREFIX_LEN = len(config.INV_META_PREFIX) + 1
+
+# SCAN pattern for tagged meta keys only; braces are literal in Redis globs
+META_SCAN_PATTERN = f"{config.INV_META_PREFIX}:{{*}}"
+
+_V1_META_PREFIX = f"{config.INV_V1_META_PREFIX}:".encode()
+_V1_IDX_PREFIX = f"{config.INV_V1_IDX_PREFIX}:".encode()
+_V1_KEY_PREFIX = f"{config.INV_V1_KEY_PREFIX}:".encode()
+
+# Contact meta fields, in the order _deserialize_meta unpacks them
+_META_FIELDS = (b"contact_id", b"priority", b"last_msg_at", b"display_name")
+
+# (priority, coin_category) pairs that may never be cached — rejected in
+# store_key before any index is read.
+_ZERO_CAPS = frozenset(
+    (priority, tier)
+    for priority, caps in config.BUDGET_CAPS.items()
+    for tier, cap in caps.items()
+    if cap == 0
+)
+
+# Inventory entries are stored as one framed String value:
+#   <pk_len:u32><sig_len:u32><fetched_at:u64> public_key signature coin_category
+# contact_id and key_id are implicit in the Redis key name.
+_ENTRY_HEADER = struct.Struct("<IIQ")
+
+# Atomic pop: oldest key_id from a tier index plus its entry, in one round trip.
+# KEYS[1] = tier index, ARGV[1] = entry key prefix for the contact. The entry
+# key shares the index's {contact_id} hash tag, so it lives in the same slot.
+_POP_LUA = """
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then return false end
+local data = redis.call('GETDEL', ARGV[1] .. popped[1])
+if not data then return false end
+return {popped[1], data}
+"""
+
+# Atomic create-if-absent for contact meta. KEYS[1] = meta key,
+# ARGV = flattened field/value pairs. Returns 1 if created, 0 if it existed.
+_REGISTER_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+redis.call('HSET', KEYS[1], unpack(ARGV))
+return 1
+"""
+
+# Write a buffered last_msg_at only while the contact still exists, so a
+# late flush never recreates a meta hash that GC or cleanup removed.
+# KEYS[1] = meta key, ARGV[1] = epoch ms. Returns 1 if written.
+_TOUCH_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+redis.call('HSET', KEYS[1], 'last_msg_at', ARGV[1])
+return 1
+"""
+
+# Same body registered as a Redis 7 Function: survives SCRIPT FLUSH and
+# reconnects, so the hot path never pays a NOSCRIPT reload.
+_INV_LIBRARY = f"""#!lua name=aqm_inv
+redis.register_function('inv_pop', function(KEYS, ARGV)
+{_POP_LUA}
+end)
+"""
+
+
+def contact_id_from_meta_key(meta_key: bytes) -> str:
+    """Inverse of the meta key builder: strip the prefix and hash-tag braces.
+
+    Only the one wrapping pair is removed; braces inside contact_id survive.
+    """
+    tagged = meta_key.decode()[_META_KEY_PREFIX_LEN:]
+    if len(tagged) >= 2 and tagged[0] == "{" and tagged[-1] == "}":
+        return tagged[1:-1]
+    return tagged
 
 
 class SmartInventory:
     def __init__(self, client: redis.Redis):
         self.db: redis.Redis = client
-
-    def _meta_key(self, contact_id: str) -> str:
-        return f"{config.INV_META_PREFIX}:{contact_id}"
-
-    def _idx_key(self, contact_id: str, coin_category: str) -> str:
-        return f"{config.INV_IDX_PREFIX}:{contact_id}:{coin_category}"
-
-    def _inv_key(self, contact_id: str, key_id: str) -> str:
-        return f"{config.INV_KEY_PREFIX}:{contact_id}:{key_id}"
+        # Write-behind buffer for last_msg_at: contact_id -> epoch ms.
+        # A timer flushes it at most INV_LAST_MSG_FLUSH_INTERVAL_MS after the
+        # first buffered touch, so other processes never see it stale for long.
+        self._pending_last_msg: dict[str, int] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._last_flush_ms = int(time.time() * 1000)
+        # contact_id -> (priority, monotonic expiry); saves an HGET per store_key
+        self._prio_cache: dict[str, tuple[str, float]] = {}
+        # EVALSHA fallback for servers without FUNCTION support (< 7.0)
+        self._pop_script = self.db.register_script(_POP_LUA)
+        self._register_script = self.db.register_script(_REGISTER_LUA)
+        self._touch_script = self.db.register_script(_TOUCH_LUA)
+        self._functions_loaded: Optional[bool] = None  # None = not probed yet
+        self._contacts_indexed = False
+        self._v1_migrated = False
+
+    def _meta_key(self, contact_id: str) -> bytes:
+        return _meta_key_bytes(contact_id)
+
+    def _idx_key(self, contact_id: str, coin_category: str) -> bytes:
+        return _idx_key_bytes(contact_id, coin_category)
+
+    def _inv_key(self, contact_id: str, key_id: str) -> bytes:
+        # key_ids are single-use, so only the per-contact prefix is cached
+        return _inv_key_prefix(contact_id) + key_id.encode()
 
     def _validate_priority(self, priority: str) -> None:
         if priority not in config.VALID_PRIORITIES:
@@ -29,54 +144,151 @@ class SmartInventory:
             raise errors.InvalidCoinCategoryError(coin_category)
 
     def _get_priority(self, contact_id: str) -> str:
+        now = time.monotonic()
+        cached = self._prio_cache.get(contact_id)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
         val = self.db.hget(self._meta_key(contact_id), "priority")
         if val is None:
             raise errors.ContactNotRegisteredError(contact_id)
-        return val.decode()
-
-    def _serialize_entry(self, contact_id: str, key_id: str, coin_category: str,
-                         public_key: bytes, signature: bytes) -> dict:
-        return {
-            "contact_id": contact_id,
-            "key_id": key_id,
-            "coin_category": coin_category,
-            "public_key": public_key,
-            "signature": signature,
-            "fetched_at": str(int(time.time() * 1000)),
-        }
-
-    def _deserialize_entry(self, contact_id: str, key_id: str, data: dict) -> InventoryEntry:
+
+        priority = val.decode()
+        if len(self._prio_cache) >= config.INV_PRIORITY_CACHE_SIZE:
+            self._prio_cache.clear()
+        self._prio_cache[contact_id] = (priority, now + config.INV_PRIORITY_CACHE_TTL)
+        return priority
+
+    def _serialize_entry(self, coin_category: str, public_key: bytes,
+                         signature: bytes, fetched_at: int) -> bytes:
+        return b"".join((
+            _ENTRY_HEADER.pack(len(public_key), len(signature), fetched_at),
+            public_key,
+            signature,
+            coin_category.encode(),
+        ))
+
+    def _deserialize_entry(self, contact_id: str, key_id: str, data: bytes) -> InventoryEntry:
+        pk_len, sig_len, fetched_at = _ENTRY_HEADER.unpack_from(data)
+        pk_end = _ENTRY_HEADER.size + pk_len
+        sig_end = pk_end + sig_len
         return InventoryEntry(
-            contact_id=data[b"contact_id"].decode(),
+            contact_id=contact_id,
             key_id=key_id,
-            coin_category=data[b"coin_category"].decode(),
-            public_key=data[b"public_key"],
-            signature=data[b"signature"],
-            fetched_at=int(data[b"fetched_at"]),
+            coin_category=data[sig_end:].decode(),
+            public_key=data[_ENTRY_HEADER.size:pk_end],
+            signature=data[pk_end:sig_end],
+            fetched_at=fetched_at,
         )
 
-    def _pop_from_tier(self, contact_id: str, coin_category: str) -> Optional[InventoryEntry]:
-        idx = self._idx_key(contact_id, coin_category)
-        result = self.db.zpopmin(idx, count=1)
-        if not result:
+    def _entry_coin_category(self, data: bytes) -> str:
+        pk_len, sig_len, _fetched_at = _ENTRY_HEADER.unpack_from(data)
+        return data[_ENTRY_HEADER.size + pk_len + sig_len:].decode()
+
+    def _deserialize_meta(self, values: list) -> Optional[ContactMeta]:
+        """Build ContactMeta from an HMGET of _META_FIELDS (None if absent)."""
+        contact_id, priority, last_msg_at, display_name = values
+        if priority is None:
             return None
 
-        key_id_bytes, score = result[0]
-        key_id = key_id_bytes.decode()
+        contact_id = contact_id.decode()
+        # Buffered updates are newer than what Redis holds
+        pending = self._pending_last_msg.get(contact_id)
+        return ContactMeta(
+            contact_id=contact_id,
+            priority=priority.decode(),
+            last_msg_at=pending if pending is not None else int(last_msg_at),
+            display_name=display_name.decode(),
+        )
+
+    def _touch_last_msg(self, contact_id: str) -> None:
+        now_ms = int(time.time() * 1000)
+        with self._pending_lock:
+            self._pending_last_msg[contact_id] = now_ms
+            due = (len(self._pending_last_msg) >= config.INV_LAST_MSG_FLUSH_THRESHOLD
+                   or now_ms - self._last_flush_ms >= config.INV_LAST_MSG_FLUSH_INTERVAL_MS)
+            if not due:
+                self._arm_flush_timer()
+        if due:
+            self.flush()
+
+    def _arm_flush_timer(self) -> None:
+        # Caller holds _pending_lock
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(
+                config.INV_LAST_MSG_FLUSH_INTERVAL_MS / 1000, self._timed_flush,
+            )
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _timed_flush(self) -> None:
+        with self._pending_lock:
+            self._flush_timer = None
+        try:
+            self.flush()
+        except (errors.InventoryUnavailableError, redis.exceptions.RedisError) as e:
+            # flush() kept the updates; try again one interval later
+            logger.warning("inventory last_msg_at flush failed: %s", e)
+            with self._pending_lock:
+                self._arm_flush_timer()
+
+    def _load_functions(self) -> bool:
+        try:
+            self.db.function_load(_INV_LIBRARY, replace=True)
+            return True
+        except redis.exceptions.ResponseError:
+            return False
+
+    def _run_pop(self, keys: list, args: list):
+        if self._functions_loaded is None:
+            self._functions_loaded = self._load_functions()
+        if not self._functions_loaded:
+            return self._pop_script(keys=keys, args=args)
+
+        try:
+            return self.db.fcall("inv_pop", len(keys), *keys, *args)
+        except redis.exceptions.ResponseError as e:
+            if "Function not found" not in str(e):
+                raise
+            # Library dropped (FUNCTION FLUSH / server restart) — reload once
+            self._functions_loaded = self._load_functions()
+            return self._run_pop(keys, args)
+
+    def _execute_with_script(self, script, queue) -> list:
+        """Execute a pipeline whose script calls are queued as plain EVALSHA.
+
+        Passing client=pipe to a Script makes execute() send SCRIPT EXISTS
+        first, a second round trip. `queue(pipe)` adds the commands; the
+        script is loaded only after a NOSCRIPT reply, then the pipeline is
+        run once more (every command queued here is safe to repeat).
+        """
+        pipe = self.db.pipeline(transaction=False)
+        queue(pipe)
+        try:
+            return pipe.execute()
+        except redis.exceptions.NoScriptError:
+            # Script cache emptied (restart / SCRIPT FLUSH) — load and retry
+            self.db.script_load(script.script)
+            pipe = self.db.pipeline(transaction=False)
+            queue(pipe)
+            return pipe.execute()
 
-        inv_key = self._inv_key(contact_id, key_id)
-        data = self.db.hgetall(inv_key)
-        if not data:
+    def _pop_from_tier(self, contact_id: str, coin_category: str) -> Optional[InventoryEntry]:
+        result = self._run_pop(
+            [self._idx_key(contact_id, coin_category)],
+            [_inv_key_prefix(contact_id)],
+        )
+        if not result:
             return None
-        self.db.delete(inv_key)
 
-        return self._deserialize_entry(contact_id, key_id, data)
+        key_id_bytes, data = result
+        return self._deserialize_entry(contact_id, key_id_bytes.decode(), data)
 
     def _trim_excess(self, contact_id: str, new_priority: str) -> int:
         new_caps = config.BUDGET_CAPS[new_priority]
         total_evicted = 0
 
-        for tier in ("GOLD", "SILVER", "BRONZE"):
+        for tier in config.TIER_ORDER:
             idx = self._idx_key(contact_id, tier)
             current_count = self.db.zcard(idx)
             cap = new_caps[tier]
@@ -96,6 +308,91 @@ class SmartInventory:
 
         return total_evicted
 
+    def _ensure_contacts_indexed(self) -> None:
+        """Backfill INV_CONTACTS_KEY once from a meta SCAN.
+
+        Contacts registered before the set existed are only reachable through
+        their meta hashes. Only tagged meta keys are matched; v1 data comes
+        in through migrate_legacy_keys. SADD is idempotent, so concurrent
+        backfills are harmless; the marker is set only after a complete pass.
+        """
+        if self._contacts_indexed:
+            return
+        if not self.db.exists(config.INV_CONTACTS_INDEXED_KEY):
+            batch = []
+            for meta_key in self.db.scan_iter(match=META_SCAN_PATTERN, count=100, _type="HASH"):
+                batch.append(contact_id_from_meta_key(meta_key))
+                if len(batch) >= 100:
+                    self.db.sadd(config.INV_CONTACTS_KEY, *batch)
+                    batch = []
+            if batch:
+                self.db.sadd(config.INV_CONTACTS_KEY, *batch)
+            self.db.set(config.INV_CONTACTS_INDEXED_KEY, 1)
+        self._contacts_indexed = True
+
+    def _migrate_v1_contact(self, v1_meta_key: bytes) -> int:
+        """Rewrite one v1 contact (meta, tier indexes, entries) under v2 names.
+
+        A contact already registered under v2 keeps its v2 state; its v1
+        keys are only dropped. Returns 1 if the contact's data was moved.
+        """
+        v1_id = v1_meta_key[len(_V1_META_PREFIX):]
+        meta = self.db.hgetall(v1_meta_key)
+        contact_id = meta.get(b"contact_id", v1_id).decode()
+
+        v1_idx = {tier: _V1_IDX_PREFIX + v1_id + b":" + tier.encode() for tier in config.TIER_ORDER}
+        pipe = self.db.pipeline(transaction=False)
+        for idx in v1_idx.values():
+            pipe.zrange(idx, 0, -1, withscores=True)
+        members = [
+            (tier, key_id, score)
+            for tier, ranked in zip(config.TIER_ORDER, pipe.execute())
+            for key_id, score in ranked
+        ]
+        v1_entries = [_V1_KEY_PREFIX + v1_id + b":" + key_id for _tier, key_id, _score in members]
+        for entry_key in v1_entries:
+            pipe.hgetall(entry_key)
+        entries = pipe.execute() if v1_entries else []
+
+        moved = not self.db.exists(self._meta_key(contact_id))
+        pipe = self.db.pipeline(transaction=True)
+        if moved:
+            pipe.hset(self._meta_key(contact_id), mapping=meta)
+            for (tier, key_id, score), data in zip(members, entries):
+                if not data:
+                    continue  # index member whose entry was already gone
+                key_id = key_id.decode()
+                pipe.set(self._inv_key(contact_id, key_id), self._serialize_entry(
+                    data[b"coin_category"].decode(), data[b"public_key"],
+                    data[b"signature"], int(data[b"fetched_at"]),
+                ))
+                pipe.zadd(self._idx_key(contact_id, tier), {key_id: score})
+            pipe.sadd(config.INV_CONTACTS_KEY, contact_id)
+        pipe.delete(v1_meta_key, *v1_idx.values(), *v1_entries)
+        pipe.execute()
+        return int(moved)
+
+    def migrate_legacy_keys(self) -> int:
+        """Move v1 inventory data into the v2 key layout, once per database.
+
+        v1 keyed contacts without a hash tag (inv:v1:meta:<contact_id>) and
+        stored entries as Hashes. Each contact is rewritten under the v2
+        names with entries re-encoded as framed Strings, and its v1 keys are
+        deleted in the same MULTI/EXEC. Returns the number of contacts moved.
+        """
+        if self._v1_migrated:
+            return 0
+        try:
+            moved = 0
+            if not self.db.exists(config.INV_V1_MIGRATED_KEY):
+                for v1_meta_key in self.db.scan_iter(match=f"{config.INV_V1_META_PREFIX}:*", count=100, _type="HASH"):
+                    moved += self._migrate_v1_contact(v1_meta_key)
+                self.db.set(config.INV_V1_MIGRATED_KEY, 1)
+            self._v1_migrated = True
+            return moved
+        except redis.exceptions.ConnectionError:
+            raise errors.InventoryUnavailableError("migrate_legacy_keys")
+
     def _estimate_entry_bytes(self, coin_category: str) -> int:
         return config.COIN_SIZE_BYTES.get(coin_category, 0) + 128  # overhead
 
@@ -105,15 +402,22 @@ class SmartInventory:
         self._validate_priority(priority)
         meta_key = self._meta_key(contact_id)
         try:
-            if self.db.exists(meta_key):
-                return False
-            self.db.hset(meta_key, mapping={
-                "contact_id": contact_id,
-                "priority": priority,
-                "display_name": display_name,
-                "last_msg_at": str(int(time.time() * 1000)),
-            })
-            return True
+            # The contacts set lives outside the contact's hash slot, so it is
+            # pipelined next to the script rather than touched inside it.
+            # SADD is idempotent, so re-registering is harmless.
+            args = (
+                "contact_id", contact_id,
+                "priority", priority,
+                "display_name", display_name,
+                "last_msg_at", str(int(time.time() * 1000)),
+            )
+
+            def queue(pipe):
+                pipe.evalsha(self._register_script.sha, 1, meta_key, *args)
+                pipe.sadd(config.INV_CONTACTS_KEY, contact_id)
+
+            created, _added = self._execute_with_script(self._register_script, queue)
+            return created == 1
         except redis.exceptions.ConnectionError:
             raise errors.InventoryUnavailableError("register_contact")
 
@@ -122,16 +426,16 @@ class SmartInventory:
         meta_key = self._meta_key(contact_id)
 
         try:
+            # Compare against the stored value, not a possibly stale cache entry
+            self._prio_cache.pop(contact_id, None)
             old_priority = self._get_priority(contact_id)
             if old_priority == priority:
                 return True
 
             self.db.hset(meta_key, "priority", priority)
+            self._prio_cache.pop(contact_id, None)
 
-            old_rank = ["BESTIE", "MATE", "STRANGER"].index(old_priority)
-            new_rank = ["BESTIE", "MATE", "STRANGER"].index(priority)
-
-            if new_rank > old_rank:
+            if config.PRIORITY_RANK[priority] > config.PRIORITY_RANK[old_priority]:
                 self._trim_excess(contact_id, priority)
 
             return True
@@ -140,18 +444,32 @@ class SmartInventory:
 
     def get_contact_meta(self, contact_id: str) -> Optional[ContactMeta]:
         try:
-            data = self.db.hgetall(self._meta_key(contact_id))
-            if not data:
+            return self._deserialize_meta(self.db.hmget(self._meta_key(contact_id), _META_FIELDS))
+        except redis.exceptions.ConnectionError:
+            raise errors.InventoryUnavailableError("get_contact_meta")
+
+    def get_contact_state(self, contact_id: str) -> Optional[ContactState]:
+        """Contact meta plus per-tier counts, fetched in a single round trip."""
+        try:
+            pipe = self.db.pipeline(transaction=False)
+            pipe.hmget(self._meta_key(contact_id), _META_FIELDS)
+            pipe.zcard(self._idx_key(contact_id, "GOLD"))
+            pipe.zcard(self._idx_key(contact_id, "SILVER"))
+            pipe.zcard(self._idx_key(contact_id, "BRONZE"))
+            values, gold, silver, bronze = pipe.execute()
+
+            meta = self._deserialize_meta(values)
+            if meta is None:
                 return None
 
-            return ContactMeta(
-                contact_id=data[b"contact_id"].decode(),
-                priority=data[b"priority"].decode(),
-                last_msg_at=int(data[b"last_msg_at"]),
-                display_name=data[b"display_name"].decode(),
+            return ContactState(
+                meta=meta,
+                gold_count=gold,
+                silver_count=silver,
+                bronze_count=bronze,
             )
         except redis.exceptions.ConnectionError:
-            raise errors.InventoryUnavailableError("get_contact_meta")
+            raise errors.InventoryUnavailableError("get_contact_state")
 
     # ─── Write Operations ───
 
@@ -167,11 +485,11 @@ class SmartInventory:
 
         try:
             priority = self._get_priority(contact_id)
-            cap = config.BUDGET_CAPS[priority][coin_category]
-
-            if cap == 0:
+            if (priority, coin_category) in _ZERO_CAPS:
                 raise errors.BudgetExceededError(contact_id, coin_category, 0, 0)
 
+            cap = config.BUDGET_CAPS[priority][coin_category]
+
             idx = self._idx_key(contact_id, coin_category)
 
             for attempt in range(config.INV_OPTIMISTIC_LOCK_RETRIES):
@@ -182,12 +500,12 @@ class SmartInventory:
                     self.db.unwatch()
                     raise errors.BudgetExceededError(contact_id, coin_category, current_count, cap)
 
-                mapping = self._serialize_entry(contact_id, key_id, coin_category, public_key, signature)
-                fetched_at = int(mapping["fetched_at"])
+                fetched_at = int(time.time() * 1000)
+                value = self._serialize_entry(coin_category, public_key, signature, fetched_at)
 
                 try:
                     pipe = self.db.pipeline(transaction=True)
-                    pipe.hset(self._inv_key(contact_id, key_id), mapping=mapping)
+                    pipe.set(self._inv_key(contact_id, key_id), value)
                     pipe.zadd(idx, {key_id: fetched_at})
                     pipe.execute()
                     return True
@@ -203,13 +521,23 @@ class SmartInventory:
     def select_coin(self, contact_id: str, desired_tier: str) -> Optional[InventoryEntry]:
         self._validate_coin_category(desired_tier)
         try:
-            self._get_priority(contact_id)
+            state = self.get_contact_state(contact_id)
+            if state is None:
+                raise errors.ContactNotRegisteredError(contact_id)
+
+            counts = {
+                "GOLD": state.gold_count,
+                "SILVER": state.silver_count,
+                "BRONZE": state.bronze_count,
+            }
             tiers_to_try = [desired_tier] + config.TIER_FALLBACK[desired_tier]
 
             for tier in tiers_to_try:
+                if counts[tier] == 0:
+                    continue
                 entry = self._pop_from_tier(contact_id, tier)
                 if entry is not None:
-                    self.db.hset(self._meta_key(contact_id), "last_msg_at", str(int(time.time() * 1000)))
+                    self._touch_last_msg(contact_id)
                     return entry
 
             return None
@@ -219,12 +547,12 @@ class SmartInventory:
     def consume_key(self, contact_id: str, key_id: str) -> bool:
         try:
             inv_key = self._inv_key(contact_id, key_id)
-            data = self.db.hget(inv_key, "coin_category")
+            data = self.db.get(inv_key)
 
             if data is None:
                 return False
 
-            coin_category = data.decode()
+            coin_category = self._entry_coin_category(data)
             pipe = self.db.pipeline(transaction=False)
             pipe.delete(inv_key)
             pipe.zrem(self._idx_key(contact_id, coin_category), key_id)
@@ -238,58 +566,97 @@ class SmartInventory:
     def get_inventory(self, contact_id: Optional[str] = None) -> dict | InventorySummary:
         try:
             if contact_id is not None:
-                meta = self.get_contact_meta(contact_id)
-                if meta is None:
+                state = self.get_contact_state(contact_id)
+                if state is None:
                     raise errors.ContactNotRegisteredError(contact_id)
 
-                gold = self.db.zcard(self._idx_key(contact_id, "GOLD"))
-                silver = self.db.zcard(self._idx_key(contact_id, "SILVER"))
-                bronze = self.db.zcard(self._idx_key(contact_id, "BRONZE"))
-
                 return InventorySummary(
                     contact_id=contact_id,
+                    gold_count=state.gold_count,
+                    silver_count=state.silver_count,
+                    bronze_count=state.bronze_count,
+                    priority=state.meta.priority,
+                )
+
+            self.migrate_legacy_keys()
+            self._ensure_contacts_indexed()
+            contact_ids = [cid.decode() for cid in self.db.sscan_iter(config.INV_CONTACTS_KEY, count=100)]
+
+            pipe = self.db.pipeline(transaction=False)
+            for cid in contact_ids:
+                pipe.hget(self._meta_key(cid), "priority")
+                for tier in config.TIER_ORDER:
+                    pipe.zcard(self._idx_key(cid, tier))
+            replies = pipe.execute()
+
+            result = {}
+            for i, cid in enumerate(contact_ids):
+                priority, gold, silver, bronze = replies[i * 4:i * 4 + 4]
+                if priority is None:
+                    continue  # meta removed out-of-band
+                result[cid] = InventorySummary(
+                    contact_id=cid,
                     gold_count=gold,
                     silver_count=silver,
                     bronze_count=bronze,
-                    priority=meta.priority,
+                    priority=priority.decode(),
                 )
 
-            result = {}
-            cursor = 0
-            while True:
-                cursor, keys = self.db.scan(cursor=cursor, match=f"{config.INV_META_PREFIX}:*", count=100)
-                for meta_key in keys:
-                    cid = meta_key.decode().split(":")[-1]
-                    result[cid] = self.get_inventory(cid)
-
-                if cursor == 0:
-                    break
-
             return result
         except redis.exceptions.ConnectionError:
             raise errors.InventoryUnavailableError("get_inventory")
 
     def has_keys_for(self, contact_id: str) -> bool:
-        try:
-            for tier in ("GOLD", "SILVER", "BRONZE"):
-                if self.db.zcard(self._idx_key(contact_id, tier)) > 0:
-                    return True
-            return False
-        except redis.exceptions.ConnectionError:
-            raise errors.InventoryUnavailableError("has_keys_for")
+        # get_available_tiers pipelines all three ZCARDs into one round trip
+        return bool(self.get_available_tiers(contact_id))
 
     def get_available_tiers(self, contact_id: str) -> list[str]:
         try:
             available = []
             pipe = self.db.pipeline(transaction=False)
-            pipe.zcard(self._idx_key(contact_id, "GOLD"))
-            pipe.zcard(self._idx_key(contact_id, "SILVER"))
-            pipe.zcard(self._idx_key(contact_id, "BRONZE"))
+            for tier in config.TIER_ORDER:
+                pipe.zcard(self._idx_key(contact_id, tier))
             counts = pipe.execute()
 
-            for tier, count in zip(("GOLD", "SILVER", "BRONZE"), counts):
+            for tier, count in zip(config.TIER_ORDER, counts):
                 if count > 0:
                     available.append(tier)
             return available
         except redis.exceptions.ConnectionError:
-            raise errors.InventoryUnavailableError("get_available_tiers")
\ No newline at end of file
+            raise errors.InventoryUnavailableError("get_available_tiers")
+
+    # ─── Write-behind Flush ───
+
+    def flush(self) -> int:
+        """Write buffered last_msg_at updates in one pipeline.
+
+        Contacts whose meta hash has been deleted meanwhile are skipped.
+        Returns the number of contacts flushed.
+        """
+        with self._pending_lock:
+            pending, self._pending_last_msg = self._pending_last_msg, {}
+            self._last_flush_ms = int(time.time() * 1000)
+            timer, self._flush_timer = self._flush_timer, None
+        if timer is not None:
+            timer.cancel()
+        if not pending:
+            return 0
+
+        def queue(pipe):
+            for contact_id, ts in pending.items():
+                pipe.evalsha(self._touch_script.sha, 1, self._meta_key(contact_id), ts)
+
+        try:
+            return sum(self._execute_with_script(self._touch_script, queue))
+        except redis.exceptions.RedisError as e:
+            # Keep the updates for the next flush unless newer ones arrived
+            with self._pending_lock:
+                for contact_id, ts in pending.items():
+                    self._pending_last_msg.setdefault(contact_id, ts)
+            if isinstance(e, (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)):
+                raise errors.InventoryUnavailableError("flush")
+            raise
+
+    def close(self) -> None:
+        """Flush buffered writes. The Redis client is owned by the caller."""
+        self.flush()
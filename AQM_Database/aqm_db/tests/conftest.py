@@ -31,7 +31,9 @@ def vault(vault_client):
 
 @pytest.fixture
 def inventory(inventory_client):
-    return SmartInventory(inventory_client)
+    inv = SmartInventory(inventory_client)
+    yield inv
+    inv.close()
 
 
 @pytest.fixture
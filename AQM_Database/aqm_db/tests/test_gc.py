@@ -88,3 +88,12 @@ def test_gc_handles_empty_inventory(gc):
     assert result.contacts_cleaned == 0
     assert result.keys_deleted == 0
     assert result.bytes_freed == 0
+
+
+def test_gc_prunes_contacts_without_meta(gc, inventory, inventory_client, registered_bestie, registered_mate):
+    inventory_client.delete(inventory._meta_key(registered_mate))
+
+    gc.garbage_collect(inactive_days=30)
+
+    members = {m.decode() for m in inventory_client.smembers(config.INV_CONTACTS_KEY)}
+    assert members == {registered_bestie}
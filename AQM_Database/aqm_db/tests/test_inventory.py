@@ -2,9 +2,11 @@ import os
 import time
 
 import pytest
+import redis
 
-from AQM_Database.aqm_shared import errors
-from AQM_Database.aqm_shared.types import InventoryEntry, InventorySummary, ContactMeta
+from AQM_Database.aqm_db.inventory import contact_id_from_meta_key
+from AQM_Database.aqm_shared import config, errors
+from AQM_Database.aqm_shared.types import InventoryEntry, InventorySummary, ContactMeta, ContactState
 
 
 def _make_pub_key(tier="GOLD"):
@@ -33,6 +35,22 @@ def test_register_contact_invalid_priority_raises(inventory):
         inventory.register_contact("alice", "ENEMY")
 
 
+def test_register_contact_skips_script_exists_probe(inventory, monkeypatch):
+    # A Script run with client=pipe makes execute() send SCRIPT EXISTS first
+    def no_probe(pipe):
+        raise AssertionError("SCRIPT EXISTS round trip")
+
+    monkeypatch.setattr(redis.client.Pipeline, "load_scripts", no_probe)
+    assert inventory.register_contact("alice", "BESTIE", "Alice") is True
+
+
+def test_register_contact_reloads_flushed_script(inventory, inventory_client):
+    inventory.register_contact("alice", "BESTIE", "Alice")
+    inventory_client.script_flush()
+    assert inventory.register_contact("bob", "MATE", "Bob") is True
+    assert inventory.register_contact("bob", "MATE", "Bob") is False
+
+
 def test_get_contact_meta(inventory, registered_bestie):
     meta = inventory.get_contact_meta(registered_bestie)
     assert isinstance(meta, ContactMeta)
@@ -61,6 +79,14 @@ def test_set_priority_downgrade_trims_excess(inventory, registered_bestie):
     assert summary.gold_count == 0
 
 
+def test_set_priority_downgrade_applies_to_next_store(inventory, registered_bestie):
+    # Prime the priority cache as BESTIE, then downgrade to MATE (Gold cap=0)
+    inventory.store_key(registered_bestie, "gold_0", "GOLD", _make_pub_key("GOLD"), _make_sig("GOLD"))
+    inventory.set_contact_priority(registered_bestie, "MATE")
+    with pytest.raises(errors.BudgetExceededError):
+        inventory.store_key(registered_bestie, "gold_1", "GOLD", _make_pub_key("GOLD"), _make_sig("GOLD"))
+
+
 def test_set_priority_unregistered_raises(inventory):
     with pytest.raises(errors.ContactNotRegisteredError):
         inventory.set_contact_priority("ghost", "BESTIE")
@@ -118,6 +144,17 @@ def test_select_coin_returns_correct_tier(inventory, registered_bestie):
     assert entry.coin_category == "GOLD"
 
 
+def test_select_coin_preserves_binary_blobs(inventory, registered_bestie):
+    pk, sig = _make_pub_key("GOLD"), _make_sig("GOLD")
+    inventory.store_key(registered_bestie, "gold_001", "GOLD", pk, sig)
+    entry = inventory.select_coin(registered_bestie, "GOLD")
+    assert entry.contact_id == registered_bestie
+    assert entry.key_id == "gold_001"
+    assert entry.public_key == pk
+    assert entry.signature == sig
+    assert entry.fetched_at > 0
+
+
 def test_select_coin_fifo_order(inventory, registered_bestie):
     # Store 3 Silver keys with small time gaps
     for i in range(3):
@@ -173,6 +210,86 @@ def test_select_coin_updates_last_msg_at(inventory, inventory_client, registered
     assert meta.last_msg_at >= before - 100  # small tolerance
 
 
+def test_select_coin_buffers_last_msg_at_until_flush(inventory, inventory_client, registered_bestie):
+    meta_key = inventory._meta_key(registered_bestie)
+    inventory.store_key(registered_bestie, "gold_001", "GOLD", _make_pub_key("GOLD"), _make_sig("GOLD"))
+    inventory.flush()
+    stored_before = inventory_client.hget(meta_key, "last_msg_at")
+
+    time.sleep(0.01)
+    inventory.select_coin(registered_bestie, "GOLD")
+    assert inventory_client.hget(meta_key, "last_msg_at") == stored_before
+
+    assert inventory.flush() == 1
+    assert int(inventory_client.hget(meta_key, "last_msg_at")) > int(stored_before)
+
+
+def test_buffered_last_msg_at_flushes_on_timer(inventory, inventory_client, registered_bestie, monkeypatch):
+    monkeypatch.setattr("AQM_Database.aqm_shared.config.INV_LAST_MSG_FLUSH_INTERVAL_MS", 50)
+    meta_key = inventory._meta_key(registered_bestie)
+    inventory.store_key(registered_bestie, "gold_001", "GOLD", _make_pub_key("GOLD"), _make_sig("GOLD"))
+    inventory.flush()
+    stored_before = inventory_client.hget(meta_key, "last_msg_at")
+
+    time.sleep(0.01)
+    inventory.select_coin(registered_bestie, "GOLD")
+    assert inventory_client.hget(meta_key, "last_msg_at") == stored_before
+
+    time.sleep(0.2)
+    assert not inventory._pending_last_msg
+    assert int(inventory_client.hget(meta_key, "last_msg_at")) > int(stored_before)
+
+
+def test_flush_does_not_recreate_deleted_meta(inventory, inventory_client, registered_bestie):
+    inventory.store_key(registered_bestie, "gold_001", "GOLD", _make_pub_key("GOLD"), _make_sig("GOLD"))
+    inventory.flush()
+    inventory.select_coin(registered_bestie, "GOLD")
+    inventory_client.delete(inventory._meta_key(registered_bestie))
+
+    assert inventory.flush() == 0
+    assert inventory_client.exists(inventory._meta_key(registered_bestie)) == 0
+
+
+@pytest.mark.parametrize("failure, raised", [
+    (redis.exceptions.TimeoutError("timed out"), errors.InventoryUnavailableError),
+    (redis.exceptions.ResponseError("OOM command not allowed"), redis.exceptions.ResponseError),
+])
+def test_flush_keeps_updates_on_redis_errors(inventory, registered_bestie, monkeypatch, failure, raised):
+    inventory.store_key(registered_bestie, "gold_001", "GOLD", _make_pub_key("GOLD"), _make_sig("GOLD"))
+    inventory.select_coin(registered_bestie, "GOLD")
+    pending = dict(inventory._pending_last_msg)
+
+    def failing_execute(script, queue):
+        raise failure
+
+    monkeypatch.setattr(inventory, "_execute_with_script", failing_execute)
+    with pytest.raises(raised):
+        inventory.flush()
+    assert inventory._pending_last_msg == pending
+
+
+def test_timed_flush_rearms_after_redis_error(inventory, registered_bestie, monkeypatch):
+    inventory.store_key(registered_bestie, "gold_001", "GOLD", _make_pub_key("GOLD"), _make_sig("GOLD"))
+    inventory.select_coin(registered_bestie, "GOLD")
+
+    def failing_execute(script, queue):
+        raise redis.exceptions.ResponseError("OOM command not allowed")
+
+    monkeypatch.setattr(inventory, "_execute_with_script", failing_execute)
+    inventory._timed_flush()
+    assert inventory._pending_last_msg
+    assert inventory._flush_timer is not None
+    inventory._flush_timer.cancel()
+
+
+def test_flush_reloads_flushed_script(inventory, inventory_client, registered_bestie):
+    inventory.store_key(registered_bestie, "gold_001", "GOLD", _make_pub_key("GOLD"), _make_sig("GOLD"))
+    inventory.select_coin(registered_bestie, "GOLD")
+    inventory_client.script_flush()
+
+    assert inventory.flush() == 1
+
+
 # ── Consume ──
 
 def test_consume_key_success(inventory, registered_bestie):
@@ -210,6 +327,99 @@ def test_get_inventory_all_contacts(inventory, registered_bestie, registered_mat
     assert registered_mate in all_inv
 
 
+def test_get_inventory_all_contacts_uses_contact_index(inventory, inventory_client, registered_bestie):
+    # Unrelated keys matching the old meta scan pattern must not leak in
+    inventory_client.set(f"{config.INV_META_PREFIX}:stray", b"x")
+    all_inv = inventory.get_inventory()
+    assert set(all_inv) == {registered_bestie}
+    assert all_inv[registered_bestie].priority == "BESTIE"
+
+
+def test_get_inventory_all_contacts_backfills_pre_index_contacts(inventory, inventory_client, registered_bestie):
+    # Contact written before the contacts set existed: meta hash only
+    inventory_client.hset(inventory._meta_key("legacy"), mapping={
+        "contact_id": "legacy", "priority": "MATE", "display_name": "", "last_msg_at": "0",
+    })
+
+    all_inv = inventory.get_inventory()
+    assert set(all_inv) == {registered_bestie, "legacy"}
+    assert inventory_client.sismember(config.INV_CONTACTS_KEY, "legacy")
+    assert inventory_client.exists(config.INV_CONTACTS_INDEXED_KEY)
+
+
+def test_get_inventory_backfill_skips_untagged_meta(inventory, inventory_client, registered_bestie):
+    # An untagged name can never be read back through the tagged key builders
+    inventory_client.delete(config.INV_CONTACTS_INDEXED_KEY)
+    inventory_client.hset(f"{config.INV_META_PREFIX}:plain", mapping={
+        "contact_id": "plain", "priority": "MATE", "display_name": "", "last_msg_at": "0",
+    })
+
+    assert set(inventory.get_inventory()) == {registered_bestie}
+    assert not inventory_client.sismember(config.INV_CONTACTS_KEY, "plain")
+
+
+def _write_v1_contact(client, contact_id, priority, entries):
+    """Write a contact in the v1 layout: untagged names, Hash entries."""
+    client.hset(f"inv:v1:meta:{contact_id}", mapping={
+        "contact_id": contact_id, "priority": priority, "display_name": "", "last_msg_at": "0",
+    })
+    for key_id, tier, public_key, signature, fetched_at in entries:
+        client.hset(f"inv:v1:key:{contact_id}:{key_id}", mapping={
+            "contact_id": contact_id, "key_id": key_id, "coin_category": tier,
+            "public_key": public_key, "signature": signature, "fetched_at": str(fetched_at),
+        })
+        client.zadd(f"inv:v1:idx:{contact_id}:{tier}", {key_id: fetched_at})
+
+
+def test_migrate_legacy_keys_moves_v1_contacts(inventory, inventory_client):
+    pk, sig = _make_pub_key("GOLD"), _make_sig("GOLD")
+    _write_v1_contact(inventory_client, "old:bob", "BESTIE", [
+        ("g1", "GOLD", pk, sig, 1000),
+        ("b1", "BRONZE", _make_pub_key("BRONZE"), _make_sig("BRONZE"), 2000),
+    ])
+
+    all_inv = inventory.get_inventory()
+    assert set(all_inv) == {"old:bob"}
+    assert (all_inv["old:bob"].gold_count, all_inv["old:bob"].bronze_count) == (1, 1)
+
+    entry = inventory.select_coin("old:bob", "GOLD")
+    assert (entry.key_id, entry.public_key, entry.signature, entry.fetched_at) == ("g1", pk, sig, 1000)
+    assert list(inventory_client.scan_iter(match="inv:v1:*")) == []
+    assert inventory.migrate_legacy_keys() == 0
+
+
+def test_migrate_legacy_keys_keeps_existing_v2_contact(inventory, inventory_client, registered_bestie):
+    _write_v1_contact(inventory_client, registered_bestie, "STRANGER", [
+        ("b1", "BRONZE", _make_pub_key("BRONZE"), _make_sig("BRONZE"), 1000),
+    ])
+
+    assert inventory.migrate_legacy_keys() == 0
+    assert inventory.get_contact_meta(registered_bestie).priority == "BESTIE"
+    assert inventory.get_available_tiers(registered_bestie) == []
+    assert list(inventory_client.scan_iter(match="inv:v1:*")) == []
+
+
+@pytest.mark.parametrize("contact_id", ["bob", "{team}", "x}", "{y", "a:b", ""])
+def test_contact_id_from_meta_key_round_trips(inventory, contact_id):
+    assert contact_id_from_meta_key(inventory._meta_key(contact_id)) == contact_id
+
+
+def test_get_contact_state(inventory, registered_bestie):
+    inventory.store_key(registered_bestie, "gold_001", "GOLD", _make_pub_key("GOLD"), _make_sig("GOLD"))
+    inventory.store_key(registered_bestie, "bronze_001", "BRONZE", _make_pub_key("BRONZE"), _make_sig("BRONZE"))
+
+    state = inventory.get_contact_state(registered_bestie)
+    assert isinstance(state, ContactState)
+    assert state.meta.priority == "BESTIE"
+    assert state.gold_count == 1
+    assert state.silver_count == 0
+    assert state.bronze_count == 1
+
+
+def test_get_contact_state_nonexistent_returns_none(inventory):
+    assert inventory.get_contact_state("nonexistent") is None
+
+
 def test_has_keys_for_true(inventory, registered_bestie):
     inventory.store_key(registered_bestie, "gold_001", "GOLD", _make_pub_key("GOLD"), _make_sig("GOLD"))
     assert inventory.has_keys_for(registered_bestie) is True
@@ -228,6 +438,35 @@ def test_get_available_tiers(inventory, registered_bestie):
     assert "BRONZE" not in tiers
 
 
+def test_select_coin_reloads_function_after_function_not_found(inventory, inventory_client, registered_bestie, monkeypatch):
+    inventory.store_key(registered_bestie, "gold_001", "GOLD", _make_pub_key("GOLD"), _make_sig("GOLD"))
+
+    loads = []
+    calls = []
+
+    def function_load(code, replace=False):
+        loads.append(code)
+        return "aqm_inv"
+
+    def fcall(name, numkeys, *keys_and_args):
+        calls.append(name)
+        if len(calls) == 1:
+            raise redis.exceptions.ResponseError("Function not found")
+        # Stand in for the Redis 7 function with the identical EVALSHA body
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        return inventory._pop_script(keys=list(keys), args=list(args))
+
+    monkeypatch.setattr(inventory_client, "function_load", function_load)
+    monkeypatch.setattr(inventory_client, "fcall", fcall)
+
+    entry = inventory.select_coin(registered_bestie, "GOLD")
+    assert entry is not None
+    assert entry.key_id == "gold_001"
+    assert calls == ["inv_pop", "inv_pop"]
+    assert len(loads) == 2  # initial probe + reload after "Function not found"
+    assert inventory._functions_loaded is True
+
+
 # ── Edge Cases ──
 
 def test_store_after_select_refills(inventory, registered_bestie):
@@ -40,6 +40,53 @@ def test_store_key_increments_stats(vault, sample_gold_key, sample_silver_key):
     assert stats.active_silver == 1
 
 
+def _bulk_entry(key_id, coin_category):
+    return (key_id, coin_category, os.urandom(100), os.urandom(12), os.urandom(16))
+
+
+def test_store_keys_bulk_success(vault):
+    entries = [_bulk_entry("g1", "GOLD"), _bulk_entry("g2", "GOLD"), _bulk_entry("b1", "BRONZE")]
+    assert vault.store_keys_bulk(entries) == 3
+    assert vault.fetch_key("g2").encrypted_blob == entries[1][2]
+    assert vault.count_active() == {"GOLD": 2, "SILVER": 0, "BRONZE": 1}
+
+
+def test_store_keys_bulk_shares_created_at(vault):
+    vault.store_keys_bulk([_bulk_entry(f"ts_{i}", "BRONZE") for i in range(5)])
+    stamps = {vault.fetch_key(f"ts_{i}").created_at for i in range(5)}
+    assert len(stamps) == 1
+
+
+def test_store_keys_bulk_existing_key_rejects_batch(vault, sample_gold_key):
+    vault.store_key(**sample_gold_key)
+    entries = [_bulk_entry("new_1", "SILVER"), _bulk_entry(sample_gold_key["key_id"], "GOLD")]
+    with pytest.raises(errors.KeyAlreadyExistsError):
+        vault.store_keys_bulk(entries)
+    assert vault.exists("new_1") is False
+    assert vault.count_active("SILVER") == 0
+
+
+def test_store_keys_bulk_never_revives_burned_key(vault, vault_client, sample_gold_key):
+    vault.store_key(**sample_gold_key)
+    vault.burn_key(sample_gold_key["key_id"])
+    with pytest.raises(errors.KeyAlreadyExistsError):
+        vault.store_keys_bulk([_bulk_entry(sample_gold_key["key_id"], "GOLD")])
+    full_key = f"{config.VAULT_KEY_PREFIX}:{sample_gold_key['key_id']}"
+    assert vault_client.hget(full_key, "status") == b"BURNED"
+    assert vault_client.ttl(full_key) <= config.VAULT_BURN_GRACE_SECONDS
+    assert vault.count_active("GOLD") == 0
+
+
+def test_store_keys_bulk_duplicate_in_batch_raises(vault):
+    with pytest.raises(errors.KeyAlreadyExistsError):
+        vault.store_keys_bulk([_bulk_entry("k1", "GOLD"), _bulk_entry("k1", "GOLD")])
+
+
+def test_store_keys_bulk_invalid_category_raises(vault):
+    with pytest.raises(errors.InvalidCoinCategoryError):
+        vault.store_keys_bulk([_bulk_entry("k1", "PLATINUM")])
+
+
 # ── Fetch ──
 
 def test_fetch_existing_key(vault, sample_gold_key):
@@ -70,6 +117,22 @@ def test_fetch_preserves_binary_blobs(vault, sample_gold_key):
     assert entry.auth_tag == sample_gold_key["auth_tag"]
 
 
+def test_fetch_selected_fields(vault, sample_gold_key):
+    vault.store_key(**sample_gold_key)
+    entry = vault.fetch_key(sample_gold_key["key_id"], fields=(b"status", b"encrypted_blob"))
+    assert entry == {
+        b"status": b"ACTIVE",
+        b"encrypted_blob": sample_gold_key["encrypted_blob"],
+    }
+
+
+def test_fetch_selected_fields_burned_returns_none(vault, sample_gold_key):
+    vault.store_key(**sample_gold_key)
+    vault.burn_key(sample_gold_key["key_id"])
+    assert vault.fetch_key(sample_gold_key["key_id"], fields=(b"encrypted_blob",)) is None
+    assert vault.fetch_key("nonexistent_key", fields=(b"status",)) is None
+
+
 # ── Burn ──
 
 def test_burn_key_success(vault, sample_gold_key):
@@ -134,6 +197,29 @@ def test_count_active_empty_vault(vault):
     assert counts == {"GOLD": 0, "SILVER": 0, "BRONZE": 0}
 
 
+def test_count_active_backfills_pre_index_entries(vault, vault_client):
+    # Entries written before the active sets existed: hash only, no SADD
+    for key_id, category, status in [("LEGACY_G", "GOLD", "ACTIVE"),
+                                      ("LEGACY_B", "BRONZE", "ACTIVE"),
+                                      ("LEGACY_X", "GOLD", "BURNED")]:
+        vault_client.hset(vault._vault_key(key_id), mapping={
+            "coin_category": category,
+            "status": status,
+            "created_at": str(int(time.time() * 1000)),
+        })
+
+    assert vault.count_active() == {"GOLD": 1, "SILVER": 0, "BRONZE": 1}
+    assert vault_client.exists(config.VAULT_ACTIVE_INDEXED_KEY)
+    assert vault.get_stats().active_gold == 1
+
+
+def test_count_active_backfill_skips_entries_without_category(vault, vault_client):
+    vault_client.hset(vault._vault_key("NO_TIER"), mapping={"status": "ACTIVE", "created_at": "0"})
+    vault_client.hset(vault._vault_key("LEGACY_S"), mapping={"coin_category": "SILVER", "status": "ACTIVE"})
+
+    assert vault.count_active() == {"GOLD": 0, "SILVER": 1, "BRONZE": 0}
+
+
 # ── Exists ──
 
 def test_exists_true(vault, sample_gold_key):
@@ -168,6 +254,13 @@ def test_get_all_active_ids_excludes_burned(vault, sample_gold_key):
     assert ids == []
 
 
+def test_get_all_active_ids_spans_scan_pages(vault):
+    vault.store_keys_bulk([_bulk_entry(f"PAGE_{i:04d}", "BRONZE") for i in range(1200)])
+    ids = vault.get_all_active_ids()
+    assert len(ids) == 1200
+    assert len(set(ids)) == 1200
+
+
 # ── Purge ──
 
 def test_purge_expired_removes_old_keys(vault, vault_client):
@@ -175,7 +268,6 @@ def test_purge_expired_removes_old_keys(vault, vault_client):
     full_key = vault._vault_key(key_id)
     old_ts = str(int((time.time() - 31 * 86400) * 1000))  # 31 days ago
     vault_client.hset(full_key, mapping={
-        "key_id": key_id,
         "coin_category": "GOLD",
         "encrypted_blob": os.urandom(100),
         "encryption_iv": os.urandom(12),
@@ -184,7 +276,7 @@ def test_purge_expired_removes_old_keys(vault, vault_client):
         "status": "ACTIVE",
         "created_at": old_ts,
     })
-    vault_client.hincrby(config.VAULT_STATS_KEY, "active_gold", 1)
+    vault_client.sadd(vault._active_key("GOLD"), key_id)
 
     purged = vault.purge_expired(max_age_days=30)
     assert purged == 1
@@ -203,7 +295,6 @@ def test_purge_updates_stats(vault, vault_client):
     full_key = vault._vault_key(key_id)
     old_ts = str(int((time.time() - 31 * 86400) * 1000))
     vault_client.hset(full_key, mapping={
-        "key_id": key_id,
         "coin_category": "SILVER",
         "encrypted_blob": os.urandom(100),
         "encryption_iv": os.urandom(12),
@@ -212,7 +303,7 @@ def test_purge_updates_stats(vault, vault_client):
         "status": "ACTIVE",
         "created_at": old_ts,
     })
-    vault_client.hincrby(config.VAULT_STATS_KEY, "active_silver", 1)
+    vault_client.sadd(vault._active_key("SILVER"), key_id)
 
     vault.purge_expired(max_age_days=30)
     stats = vault.get_stats()
@@ -220,6 +311,92 @@ def test_purge_updates_stats(vault, vault_client):
     assert stats.total_expired == 1
 
 
+def test_handle_expired_drops_active_key(vault, vault_client, sample_gold_key):
+    vault.store_key(**sample_gold_key)
+    full_key = vault._vault_key(sample_gold_key["key_id"])
+    vault_client.delete(full_key)  # as if the TTL fired
+
+    assert vault.handle_expired({"data": full_key}) is True
+    stats = vault.get_stats()
+    assert stats.active_gold == 0
+    assert stats.total_expired == 1
+
+
+def test_handle_expired_ignores_burned_and_foreign_keys(vault, sample_gold_key):
+    vault.store_key(**sample_gold_key)
+    vault.burn_key(sample_gold_key["key_id"])
+
+    assert vault.handle_expired({"data": vault._vault_key(sample_gold_key["key_id"])}) is False
+    assert vault.handle_expired({"data": b"inv:v1:meta:{bob}"}) is False
+    assert vault.get_stats().total_expired == 0
+
+
+def test_expiry_listener_handles_published_events(vault, vault_client, sample_gold_key):
+    vault.store_key(**sample_gold_key)
+    full_key = vault._vault_key(sample_gold_key["key_id"])
+    vault_client.delete(full_key)
+
+    listener = vault.start_expiry_listener(poll_interval=0.01)
+    try:
+        # fakeredis does not emit keyevents, so publish the one Redis would
+        vault_client.publish("__keyevent@0__:expired", full_key)
+        deadline = time.monotonic() + 2
+        while vault.get_stats().total_expired == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        listener.stop()
+
+    assert vault.get_stats().total_expired == 1
+    assert vault.count_active("GOLD") == 0
+
+
+def test_expiry_listener_survives_handler_errors(vault, vault_client, monkeypatch, sample_gold_key):
+    vault.store_key(**sample_gold_key)
+    full_key = vault._vault_key(sample_gold_key["key_id"])
+    vault_client.delete(full_key)
+
+    handle_expired = vault.handle_expired
+    calls = []
+
+    def flaky_handle_expired(message):
+        calls.append(message)
+        if len(calls) == 1:
+            raise errors.VaultUnavailableError("handle_expired")
+        return handle_expired(message)
+
+    monkeypatch.setattr(vault, "handle_expired", flaky_handle_expired)
+    listener = vault.start_expiry_listener(poll_interval=0.01)
+    try:
+        for _ in range(2):
+            vault_client.publish("__keyevent@0__:expired", full_key)
+        deadline = time.monotonic() + 2
+        while vault.get_stats().total_expired == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert listener.is_alive()
+    finally:
+        listener.stop()
+
+    assert len(calls) == 2
+    assert vault.get_stats().total_expired == 1
+
+
+@pytest.mark.parametrize("current, expected", [
+    ("", "Ex"),
+    ("xE", None),
+    ("Kl", "KlEx"),
+    ("AK", "AKE"),
+])
+def test_enable_expiry_events_keeps_existing_flags(vault, monkeypatch, current, expected):
+    written = []
+    monkeypatch.setattr(vault.db, "config_get",
+                        lambda name: {name.encode(): current.encode()})
+    monkeypatch.setattr(vault.db, "config_set",
+                        lambda name, value: written.append(value))
+
+    vault._enable_expiry_events()
+    assert written == ([expected] if expected else [])
+
+
 # ── Stats ──
 
 def test_get_stats_empty(vault):
@@ -1,3 +1,4 @@
+import logging
 import time
 from typing import Optional
 
@@ -6,41 +7,192 @@ import redis
 from AQM_Database.aqm_shared import errors, config
 from AQM_Database.aqm_shared.types import VaultEntry, VaultStats
 
+logger = logging.getLogger(__name__)
+
+# Atomic create-if-absent for one vault entry. KEYS[1] = entry hash,
+# KEYS[2] = tier active set, ARGV[1] = TTL seconds, ARGV[2] = key_id,
+# ARGV[3..] = flattened field/value pairs. Returns 1 if stored, 0 if it existed.
+_STORE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('SADD', KEYS[2], ARGV[2])
+return 1
+"""
+
+# Atomic all-or-nothing create for a batch. KEYS[1..n] = entry hashes,
+# ARGV[1] = TTL seconds, ARGV[2] = per-entry stride; entry i's ARGV group
+# is key_id, tier active set, then its flattened field/value pairs.
+# Returns the 1-based index of the first key that exists (writing nothing),
+# or 0 once every entry is stored.
+_STORE_BULK_LUA = """
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then return i end
+end
+local stride = tonumber(ARGV[2])
+for i, key in ipairs(KEYS) do
+    local base = 3 + (i - 1) * stride
+    redis.call('HSET', key, unpack(ARGV, base + 2, base + stride - 1))
+    redis.call('EXPIRE', key, ARGV[1])
+    redis.call('SADD', ARGV[base + 1], ARGV[base])
+end
+return 0
+"""
+
+# Server-side scanners: each call runs one SCAN step and filters the batch in
+# Lua, so only matching key_ids cross the wire — one round trip per cursor
+# step instead of SCAN plus an HMGET pipeline.
+# ARGV[1] = cursor, ARGV[2] = MATCH pattern, ARGV[3] = COUNT,
+# ARGV[4] = prefix length to strip from key names.
+# ARGV[5] = coin_category filter, "" for all tiers.
+# Returns {next_cursor, key_id, key_id, ...}.
+_SCAN_ACTIVE_LUA = """
+local page = redis.call('SCAN', ARGV[1], 'MATCH', ARGV[2], 'COUNT', ARGV[3])
+local out = {page[1]}
+for _, key in ipairs(page[2]) do
+    local f = redis.call('HMGET', key, 'status', 'coin_category')
+    if f[1] == 'ACTIVE' and (ARGV[5] == '' or f[2] == ARGV[5]) then
+        out[#out + 1] = string.sub(key, ARGV[4] + 1)
+    end
+end
+return out
+"""
+
+# KEYS[1] = stats hash, ARGV[5] = created_at cutoff in ms, ARGV[6] = active
+# set prefix. Matching keys are deleted, dropped from their tier's active set
+# and counted in the same script, so nothing can touch a key between the age
+# check and the delete. Returns {next_cursor, purged}.
+_PURGE_EXPIRED_LUA = """
+local page = redis.call('SCAN', ARGV[1], 'MATCH', ARGV[2], 'COUNT', ARGV[3])
+local cutoff = tonumber(ARGV[5])
+local purged = 0
+for _, key in ipairs(page[2]) do
+    local f = redis.call('HMGET', key, 'status', 'coin_category', 'created_at')
+    if f[1] == 'ACTIVE' and tonumber(f[3]) <= cutoff then
+        redis.call('DEL', key)
+        redis.call('SREM', ARGV[6] .. ':' .. f[2], string.sub(key, ARGV[4] + 1))
+        redis.call('HINCRBY', KEYS[1], 'total_expired', 1)
+        purged = purged + 1
+    end
+end
+return {page[1], purged}
+"""
+
+# One-time backfill of the tier active sets for entries written before the
+# sets existed. ARGV[5] = active set prefix; entries without a coin_category
+# are skipped. Returns {next_cursor, added}.
+_INDEX_ACTIVE_LUA = """
+local page = redis.call('SCAN', ARGV[1], 'MATCH', ARGV[2], 'COUNT', ARGV[3])
+local added = 0
+for _, key in ipairs(page[2]) do
+    local f = redis.call('HMGET', key, 'status', 'coin_category')
+    if f[1] == 'ACTIVE' and f[2] then
+        added = added + redis.call('SADD', ARGV[5] .. ':' .. f[2], string.sub(key, ARGV[4] + 1))
+    end
+end
+return {page[1], added}
+"""
+
+# Expiry bookkeeping for a key Redis has already dropped by TTL.
+# KEYS[1..3] = tier active sets, KEYS[4] = stats hash, ARGV[1] = key_id.
+# Only a key that was still ACTIVE (i.e. in a set) counts as expired;
+# burned keys were already removed from their set at burn time.
+_ON_EXPIRED_LUA = """
+local removed = 0
+for i = 1, 3 do
+    removed = removed + redis.call('SREM', KEYS[i], ARGV[1])
+end
+if removed > 0 then
+    redis.call('HINCRBY', KEYS[4], 'total_expired', 1)
+end
+return removed
+"""
+
+# Pre-encoded hash field names for the Python-side HMGET paths. Only
+# fetch_key builds a VaultEntry; other reads unpack the HMGET list directly.
+_STATUS_B = b"status"
+_CATEGORY_B = b"coin_category"
+_STATUS_FIELD = (_STATUS_B,)
+_STATUS_CAT_FIELDS = (_STATUS_B, _CATEGORY_B)
+
+# Key names are built by bytes concat / dict lookup rather than an f-string
+# per call; redis-py sends bytes keys as-is.
+_VAULT_PREFIX = f"{config.VAULT_KEY_PREFIX}:".encode()
+_ACTIVE_KEYS = {
+    c: f"{config.VAULT_ACTIVE_PREFIX}:{c}".encode() for c in config.VALID_COIN_CATEGORIES
+}
+_VALID_CATEGORIES = frozenset(config.VALID_COIN_CATEGORIES)
+
+_SCAN_PATTERN = f"{config.VAULT_KEY_PREFIX}:*"
+_SCAN_PREFIX_LEN = len(config.VAULT_KEY_PREFIX) + 1
+
 
 class SecureVault:
     def __init__(self, client: redis.Redis):
         self.db: redis.Redis = client
-
-    def _vault_key(self, key_id: str) -> str:
-        return f"{config.VAULT_KEY_PREFIX}:{key_id}"
+        self._store_script = self.db.register_script(_STORE_LUA)
+        self._store_bulk_script = self.db.register_script(_STORE_BULK_LUA)
+        self._scan_active_script = self.db.register_script(_SCAN_ACTIVE_LUA)
+        self._purge_expired_script = self.db.register_script(_PURGE_EXPIRED_LUA)
+        self._on_expired_script = self.db.register_script(_ON_EXPIRED_LUA)
+        self._index_active_script = self.db.register_script(_INDEX_ACTIVE_LUA)
+        self._active_indexed = False
+
+    def _vault_key(self, key_id: str) -> bytes:
+        return _VAULT_PREFIX + key_id.encode()
+
+    def _active_key(self, coin_category: str) -> bytes:
+        return _ACTIVE_KEYS[coin_category]
+
+    def _ensure_active_indexed(self) -> None:
+        """Backfill the tier active sets once from a SCAN of vault entries.
+
+        Entries stored before the sets existed would otherwise be invisible
+        to the SCARD-based counts. SADD is idempotent, so concurrent backfills
+        are harmless; the marker is set only after a complete pass.
+        """
+        if self._active_indexed:
+            return
+        if not self.db.exists(config.VAULT_ACTIVE_INDEXED_KEY):
+            cursor = b"0"
+            while True:
+                cursor, _added = self._index_active_script(args=[
+                    cursor, _SCAN_PATTERN, config.VAULT_SCAN_COUNT,
+                    _SCAN_PREFIX_LEN, config.VAULT_ACTIVE_PREFIX,
+                ])
+                if cursor == b"0":
+                    break
+            self.db.set(config.VAULT_ACTIVE_INDEXED_KEY, 1)
+        self._active_indexed = True
 
     def _validate_coin_category(self, coin_category: str) -> None:
-        if coin_category not in config.VALID_COIN_CATEGORIES:
+        if coin_category not in _VALID_CATEGORIES:
             raise errors.InvalidCoinCategoryError(coin_category)
 
     def _serialize_entry(
         self,
-        key_id: str,
         coin_category: str,
         encrypted_blob: bytes,
         encryption_iv: bytes,
         auth_tag: bytes,
         coin_version: str,
+        created_at_override: Optional[bytes] = None,
     ) -> dict:
+        # key_id is implicit in the Redis key name, so it is not stored
         return {
-            "key_id": key_id,
             "coin_category": coin_category,
             "encrypted_blob": encrypted_blob,
             "encryption_iv": encryption_iv,
             "auth_tag": auth_tag,
             "coin_version": coin_version,
-            "status": "ACTIVE",
-            "created_at": str(int(time.time() * 1000)),
+            "status": b"ACTIVE",
+            # Passed as bytes so redis-py skips its own str -> bytes encode
+            "created_at": created_at_override or b"%d" % int(time.time() * 1000),
         }
 
-    def _deserialize_entry(self, data: dict[bytes, bytes]) -> VaultEntry:
+    def _deserialize_entry(self, key_id: str, data: dict[bytes, bytes]) -> VaultEntry:
         return VaultEntry(
-            key_id=data[b"key_id"].decode(),
+            key_id=key_id,
             coin_category=data[b"coin_category"].decode(),
             encrypted_blob=data[b"encrypted_blob"],
             encryption_iv=data[b"encryption_iv"],
@@ -62,33 +214,78 @@ class SecureVault:
         self._validate_coin_category(coin_category)
         full_key = self._vault_key(key_id)
 
+        mapping = self._serialize_entry(
+            coin_category, encrypted_blob, encryption_iv, auth_tag, coin_version
+        )
+
         try:
-            if self.db.exists(full_key):
+            created = self._store_script(
+                keys=[full_key, self._active_key(coin_category)],
+                args=[
+                    config.VAULT_KEY_TTL_SECONDS,
+                    key_id,
+                    *(item for pair in mapping.items() for item in pair),
+                ],
+            )
+            if not created:
                 raise errors.KeyAlreadyExistsError(key_id)
 
+            return True
+        except redis.exceptions.ConnectionError:
+            raise errors.VaultUnavailableError("store_key")
+
+    def store_keys_bulk(
+        self,
+        entries: list[tuple[str, str, bytes, bytes, bytes]],
+        coin_version: str = "kyber768_v1",
+    ) -> int:
+        """Store many keys atomically in one round trip instead of one per key.
+
+        Each entry is (key_id, coin_category, encrypted_blob, encryption_iv,
+        auth_tag). The batch is rejected as a whole if any key_id is invalid,
+        repeated, or already in the vault. Returns the number of keys stored.
+        """
+        if not entries:
+            return 0
+
+        seen: set[str] = set()
+        for key_id, coin_category, *_blobs in entries:
+            self._validate_coin_category(coin_category)
+            if key_id in seen:
+                raise errors.KeyAlreadyExistsError(key_id)
+            seen.add(key_id)
+
+        # One timestamp for the whole batch
+        now_ms = b"%d" % int(time.time() * 1000)
+        keys = []
+        args = [config.VAULT_KEY_TTL_SECONDS, 0]
+        for key_id, coin_category, encrypted_blob, encryption_iv, auth_tag in entries:
+            keys.append(self._vault_key(key_id))
             mapping = self._serialize_entry(
-                key_id, coin_category, encrypted_blob, encryption_iv, auth_tag, coin_version
+                coin_category, encrypted_blob, encryption_iv, auth_tag, coin_version,
+                created_at_override=now_ms,
             )
+            args += [key_id, self._active_key(coin_category)]
+            args += [item for pair in mapping.items() for item in pair]
+        args[1] = (len(args) - 2) // len(entries)
 
-            pipe = self.db.pipeline(transaction=True)
-            pipe.hset(full_key, mapping=mapping)
-            pipe.expire(full_key, config.VAULT_KEY_TTL_SECONDS)
-            pipe.hincrby(config.VAULT_STATS_KEY, f"active_{coin_category.lower()}", 1)
-            pipe.execute()
+        try:
+            existing = self._store_bulk_script(keys=keys, args=args)
+            if existing:
+                raise errors.KeyAlreadyExistsError(entries[existing - 1][0])
 
-            return True
+            return len(entries)
         except redis.exceptions.ConnectionError:
-            raise errors.VaultUnavailableError("store_key")
+            raise errors.VaultUnavailableError("store_keys_bulk")
 
     def burn_key(self, key_id: str) -> bool:
         full_key = self._vault_key(key_id)
         try:
-            data = self.db.hmget(full_key, "status", "coin_category")
-            status, coin_category = data
+            status, coin_category = self.db.hmget(full_key, *_STATUS_CAT_FIELDS)
 
             if status is None:
                 raise errors.KeyNotFoundError(key_id)
-            if status.decode() == "BURNED":
+            if status == b"BURNED":
                 raise errors.KeyAlreadyBurnedError(key_id)
 
             coin_cat = coin_category.decode()
@@ -96,7 +293,7 @@ class SecureVault:
             pipe = self.db.pipeline(transaction=True)
             pipe.hset(full_key, "status", "BURNED")
             pipe.expire(full_key, config.VAULT_BURN_GRACE_SECONDS)
-            pipe.hincrby(config.VAULT_STATS_KEY, f"active_{coin_cat.lower()}", -1)
+            pipe.srem(self._active_key(coin_cat), key_id)
             pipe.hincrby(config.VAULT_STATS_KEY, "total_burned", 1)
             pipe.execute()
 
@@ -104,17 +301,32 @@ class SecureVault:
         except redis.exceptions.ConnectionError:
             raise errors.VaultUnavailableError("burn_key")
 
-    def fetch_key(self, key_id: str) -> Optional[VaultEntry]:
+    def fetch_key(
+        self,
+        key_id: str,
+        fields: Optional[tuple[bytes, ...]] = None,
+    ) -> Optional[VaultEntry | dict[bytes, bytes]]:
+        """Return the live entry for key_id, or None if missing or burned.
+
+        With `fields`, only those hash fields are read (HMGET) and returned
+        as a raw {field: value} dict instead of a decoded VaultEntry.
+        """
         full_key = self._vault_key(key_id)
         try:
+            if fields is not None:
+                status, *values = self.db.hmget(full_key, *_STATUS_FIELD, *fields)
+                if status is None or status == b"BURNED":
+                    return None
+                return dict(zip(fields, values))
+
             data = self.db.hgetall(full_key)
             if not data:
                 return None
 
-            if data.get(b"status", b"").decode() == "BURNED":
+            if data.get(_STATUS_B, b"").decode() == "BURNED":
                 return None
 
-            return self._deserialize_entry(data)
+            return self._deserialize_entry(key_id, data)
         except redis.exceptions.ConnectionError:
             raise errors.VaultUnavailableError("fetch_key")
 
@@ -129,16 +341,14 @@ class SecureVault:
             self._validate_coin_category(coin_category)
 
         try:
+            self._ensure_active_indexed()
             if coin_category is not None:
-                val = self.db.hget(config.VAULT_STATS_KEY, f"active_{coin_category.lower()}")
-                return int(val) if val else 0
-
-            stats = self.db.hgetall(config.VAULT_STATS_KEY)
-            return {
-                "GOLD": int(stats.get(b"active_gold", 0)),
-                "SILVER": int(stats.get(b"active_silver", 0)),
-                "BRONZE": int(stats.get(b"active_bronze", 0)),
-            }
+                return self.db.scard(self._active_key(coin_category))
+
+            pipe = self.db.pipeline(transaction=False)
+            for tier in config.TIER_ORDER:
+                pipe.scard(self._active_key(tier))
+            return dict(zip(config.TIER_ORDER, pipe.execute()))
         except redis.exceptions.ConnectionError:
             raise errors.VaultUnavailableError("count_active")
 
@@ -146,31 +356,17 @@ class SecureVault:
         if coin_category is not None:
             self._validate_coin_category(coin_category)
 
+        category_arg = coin_category or ""
         try:
             active_ids: list[str] = []
-            cursor = 0
-            pattern = f"{config.VAULT_KEY_PREFIX}:*"
+            cursor = b"0"
             while True:
-                cursor, keys = self.db.scan(cursor=cursor, match=pattern, count=100)
-                if keys:
-                    pipe = self.db.pipeline(transaction=False)
-                    for key in keys:
-                        pipe.hmget(key, "status", "coin_category")
-                    results = pipe.execute()
-
-                    for key, (status, category) in zip(keys, results):
-                        if status is None:
-                            continue
-                        if status.decode() != "ACTIVE":
-                            continue
-                        if coin_category and category.decode() != coin_category:
-                            continue
-
-                        raw_key = key.decode()
-                        key_id = raw_key[len(config.VAULT_KEY_PREFIX) + 1:]
-                        active_ids.append(key_id)
-
-                if cursor == 0:
+                cursor, *key_ids = self._scan_active_script(args=[
+                    cursor, _SCAN_PATTERN, config.VAULT_SCAN_COUNT,
+                    _SCAN_PREFIX_LEN, category_arg,
+                ])
+                active_ids.extend(k.decode() for k in key_ids)
+                if cursor == b"0":
                     break
             return active_ids
         except redis.exceptions.ConnectionError:
@@ -179,43 +375,104 @@ class SecureVault:
     def purge_expired(self, max_age_days: int = 30) -> int:
         cutoff_ms = int((time.time() - max_age_days * 86400) * 1000)
         purged = 0
-        cursor = 0
-        pattern = f"{config.VAULT_KEY_PREFIX}:*"
+        cursor = b"0"
         try:
             while True:
-                cursor, keys = self.db.scan(cursor=cursor, match=pattern, count=100)
-                for key in keys:
-                    raw = self.db.hmget(key, "status", "coin_category", "created_at")
-                    status, category, created_at = raw
-
-                    if status is None or status.decode() != "ACTIVE":
-                        continue
-                    if int(created_at) > cutoff_ms:
-                        continue
-
-                    coin_cat = category.decode()
-                    pipe = self.db.pipeline(transaction=True)
-                    pipe.delete(key)
-                    pipe.hincrby(config.VAULT_STATS_KEY, f"active_{coin_cat.lower()}", -1)
-                    pipe.hincrby(config.VAULT_STATS_KEY, "total_expired", 1)
-                    pipe.execute()
-                    purged += 1
-
-                if cursor == 0:
+                cursor, batch_purged = self._purge_expired_script(
+                    keys=[config.VAULT_STATS_KEY],
+                    args=[
+                        cursor, _SCAN_PATTERN, config.VAULT_SCAN_COUNT,
+                        _SCAN_PREFIX_LEN, cutoff_ms, config.VAULT_ACTIVE_PREFIX,
+                    ],
+                )
+                purged += batch_purged
+                if cursor == b"0":
                     break
             return purged
         except redis.exceptions.ConnectionError:
             raise errors.VaultUnavailableError("purge_expired")
 
+    def handle_expired(self, message: dict) -> bool:
+        """Account for one `expired` keyevent; True if an active key expired.
+
+        Keys Redis drops by TTL never pass through burn_key/purge_expired,
+        so without this their key_id would linger in the tier's active set.
+        """
+        key = message["data"]
+        if not key.startswith(_VAULT_PREFIX):
+            return False
+        try:
+            return bool(self._on_expired_script(
+                keys=[*_ACTIVE_KEYS.values(), config.VAULT_STATS_KEY],
+                args=[key[len(_VAULT_PREFIX):]],
+            ))
+        except redis.exceptions.ConnectionError:
+            raise errors.VaultUnavailableError("handle_expired")
+
+    def _enable_expiry_events(self) -> None:
+        """Add the VAULT_EXPIRY_EVENTS flags to notify-keyspace-events.
+
+        Flags the server already has are kept. If CONFIG GET/SET is not
+        allowed, the flags must be set in the Redis config instead.
+        """
+        try:
+            values = self.db.config_get("notify-keyspace-events")
+        except redis.exceptions.ResponseError:
+            return
+        current = next(iter(values.values()), b"")
+        if isinstance(current, bytes):
+            current = current.decode()
+        # "A" is the alias for every key-event class, "x" included
+        missing = "".join(
+            flag for flag in config.VAULT_EXPIRY_EVENTS
+            if flag not in current and not (flag in "g$lshzxet" and "A" in current)
+        )
+        if not missing:
+            return
+        try:
+            self.db.config_set("notify-keyspace-events", current + missing)
+        except redis.exceptions.ResponseError:
+            pass
+
+    def start_expiry_listener(self, poll_interval: float = 1.0):
+        """Subscribe to this DB's expired keyevents and handle them in a daemon thread.
+
+        Adds the `E` and `x` notify-keyspace-events flags to whatever the
+        server already has, if CONFIG is allowed. purge_expired stays as a
+        periodic safety net for events missed while not subscribed.
+        Returns the worker thread; call .stop() on it to unsubscribe.
+        """
+        def keep_listening(exc, _pubsub, _thread):
+            # The worker re-raises by default, which ends the thread and
+            # silently stops TTL accounting. Log, back off one poll interval
+            # and carry on; get_message reconnects on the next poll.
+            logger.warning("vault expiry listener error: %s", exc, exc_info=exc)
+            time.sleep(poll_interval)
+
+        try:
+            self._enable_expiry_events()
+            db = self.db.connection_pool.connection_kwargs.get("db", 0)
+            pubsub = self.db.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{f"__keyevent@{db}__:expired": self.handle_expired})
+            return pubsub.run_in_thread(sleep_time=poll_interval, daemon=True,
+                                        exception_handler=keep_listening)
+        except redis.exceptions.ConnectionError:
+            raise errors.VaultUnavailableError("start_expiry_listener")
+
     def get_stats(self) -> VaultStats:
         try:
-            stats = self.db.hgetall(config.VAULT_STATS_KEY)
+            self._ensure_active_indexed()
+            pipe = self.db.pipeline(transaction=False)
+            for tier in config.TIER_ORDER:
+                pipe.scard(self._active_key(tier))
+            pipe.hmget(config.VAULT_STATS_KEY, "total_burned", "total_expired")
+            gold, silver, bronze, (burned, expired) = pipe.execute()
             return VaultStats(
-                active_gold=int(stats.get(b"active_gold", 0)),
-                active_silver=int(stats.get(b"active_silver", 0)),
-                active_bronze=int(stats.get(b"active_bronze", 0)),
-                total_burned=int(stats.get(b"total_burned", 0)),
-                total_expired=int(stats.get(b"total_expired", 0)),
+                active_gold=gold,
+                active_silver=silver,
+                active_bronze=bronze,
+                total_burned=int(burned or 0),
+                total_expired=int(expired or 0),
             )
         except redis.exceptions.ConnectionError:
             raise errors.VaultUnavailableError("get_stats")
\ No newline at end of file
@@ -1,3 +1,5 @@
+from contextlib import nullcontext
+from typing import Optional
 from uuid import UUID
 
 import asyncpg
@@ -5,6 +7,12 @@ import asyncio
 from AQM_Database.aqm_shared.types import CoinUpload, CoinRecord, InventoryCount
 from AQM_Database.aqm_shared import errors
 
+# Below this many coins a COPY's extra staging statements cost more than
+# the per-row INSERTs they replace.
+COPY_UPLOAD_THRESHOLD = 8
+
+_UPLOAD_COLUMNS = ["user_id", "key_id", "coin_category", "public_key_blob", "signature_blob"]
+
 
 class CoinInventoryServer:
     pool:asyncpg.Pool
@@ -12,12 +20,23 @@ class CoinInventoryServer:
     def __init__(self , p : asyncpg.Pool):
         self.pool = p
 
+    def _connection(self, conn: Optional[asyncpg.Connection]):
+        """Use the caller's pinned connection, or borrow one from the pool.
+
+        Callers that issue several queries in a row (a demo phase, a sync
+        loop) can hold one connection across them; asyncpg then reuses its
+        per-connection prepared statements instead of re-parsing each query.
+        """
+        return nullcontext(conn) if conn is not None else self.pool.acquire()
 
-    async def upload_coins(self, user_id : UUID, coins : list[CoinUpload]) -> int:
+    async def upload_coins(self, user_id : UUID, coins : list[CoinUpload],
+                           conn: Optional[asyncpg.Connection] = None) -> int:
         if not coins:
             return 0
+        if len(coins) >= COPY_UPLOAD_THRESHOLD:
+            return await self._upload_coins_copy(user_id, coins, conn)
         try:
-            async with self.pool.acquire() as conn:
+            async with self._connection(conn) as conn:
                 inserted = 0
                 async with conn.transaction():
                     for coin in coins:
@@ -42,16 +61,60 @@ class CoinInventoryServer:
             raise errors.UploadError(f"upload_coins failed: {e}")
 
 
+    async def _upload_coins_copy(self, user_id: UUID, coins: list[CoinUpload],
+                                 conn: Optional[asyncpg.Connection] = None) -> int:
+        """Binary COPY into a staging table, then one INSERT ... SELECT.
+
+        COPY cannot express ON CONFLICT, so rows land in a per-transaction
+        temp table first; duplicate key_ids are still skipped, not raised.
+        Inside a caller's outer transaction this block is only a savepoint and
+        ON COMMIT DROP has not fired yet, so the table may already exist from
+        an earlier upload — reuse it and clear out that upload's rows.
+        """
+        try:
+            async with self._connection(conn) as conn:
+                async with conn.transaction():
+                    await conn.execute("""
+                                       CREATE TEMP TABLE IF NOT EXISTS coin_upload_stage (
+                                           user_id UUID,
+                                           key_id VARCHAR(36),
+                                           coin_category VARCHAR(6),
+                                           public_key_blob BYTEA,
+                                           signature_blob BYTEA
+                                       ) ON COMMIT DROP
+                                       """)
+                    await conn.execute("TRUNCATE coin_upload_stage")
+                    await conn.copy_records_to_table(
+                        "coin_upload_stage",
+                        columns=_UPLOAD_COLUMNS,
+                        records=[
+                            (user_id, coin.key_id, coin.coin_category, coin.public_key_blob, coin.signature_blob)
+                            for coin in coins
+                        ],
+                    )
+                    result = await conn.execute("""
+                                                INSERT INTO coin_inventory
+                                                    (user_id, key_id, coin_category, public_key_blob, signature_blob)
+                                                SELECT user_id, key_id, coin_category, public_key_blob, signature_blob
+                                                FROM coin_upload_stage
+                                                ON CONFLICT (user_id, key_id) DO NOTHING
+                                                """)
+                    # result is "INSERT 0 N" string
+                    return int(result.split()[-1])
+        except asyncpg.PostgresError as e:
+            raise errors.UploadError(f"upload_coins failed: {e}")
+
     async def fetch_coins(self , target_user_id : UUID ,
                           requester_id: UUID ,
                           coin_category:str ,
-                          count : int) -> list[CoinRecord]:
+                          count : int,
+                          conn: Optional[asyncpg.Connection] = None) -> list[CoinRecord]:
 
         if coin_category not in  ("GOLD", "SILVER", "BRONZE"):
             raise errors.InvalidCoinCategoryError(f"Invalid coin category: {coin_category}")
 
         try:
-            async with self.pool.acquire() as conn:
+            async with self._connection(conn) as conn:
                 async with conn.transaction():
                     rws = await conn.fetch("""
                                            WITH claimed AS (
@@ -84,9 +147,10 @@ class CoinInventoryServer:
         except  asyncpg.PostgresError as e:
             raise errors.FetchError(f"fetch_coins failed: {e}")
 
-    async def get_inventory_count(self, user_id: UUID) -> InventoryCount:
+    async def get_inventory_count(self, user_id: UUID,
+                                  conn: Optional[asyncpg.Connection] = None) -> InventoryCount:
         try:
-            async with self.pool.acquire() as conn:
+            async with self._connection(conn) as conn:
                 rows = await conn.fetch(
                     """
                     SELECT coin_category, COUNT(*) as cnt
@@ -1,6 +1,7 @@
 import asyncpg
 import asyncio
 
+from AQM_Database.aqm_server import config
 from AQM_Database.aqm_shared.errors import ConnectionPoolError
 
 pool: asyncpg.Pool = None
@@ -15,6 +16,8 @@ async def create_pool(dsn: str, min_size: int = 5, max_size: int = 20) -> asyncp
             dsn=dsn,
             max_size=max_size,
             min_size=min_size,
+            max_inactive_connection_lifetime=config.PG_POOL_MAX_INACTIVE_LIFETIME,
+            max_queries=config.PG_POOL_MAX_QUERIES,
         )
     except (asyncpg.PostgresError, OSError) as e:
         raise ConnectionPoolError(f"Failed to create pool: {e}")
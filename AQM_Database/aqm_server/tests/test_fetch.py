@@ -128,3 +128,14 @@ async def test_concurrent_fetch_different_tiers(inventory, bob_id):
     assert len(silver_res) == 5
     assert all(r.coin_category == "GOLD" for r in gold_res)
     assert all(r.coin_category == "SILVER" for r in silver_res)
+
+
+async def test_fetch_on_pinned_connection(inventory, pool, bob_id, alice_id):
+    """Upload, fetch and count can all share one caller-held connection."""
+    async with pool.acquire() as conn:
+        await inventory.upload_coins(bob_id, make_coins(3, "GOLD"), conn)
+        result = await inventory.fetch_coins(bob_id, alice_id, "GOLD", 2, conn)
+        count = await inventory.get_inventory_count(bob_id, conn)
+
+    assert len(result) == 2
+    assert count.gold == 1
@@ -43,6 +43,31 @@ async def test_upload_duplicate_idempotent(inventory, bob_id):
     assert count.gold == 3
 
 
+async def test_upload_large_batch_duplicate_idempotent(inventory, bob_id):
+    # Large enough to take the COPY path
+    coins = make_coins(10, "BRONZE")
+    assert await inventory.upload_coins(bob_id, coins) == 10
+    assert await inventory.upload_coins(bob_id, coins) == 0
+
+    count = await inventory.get_inventory_count(bob_id)
+    assert count.bronze == 10
+
+
+async def test_upload_large_batches_in_one_outer_transaction(inventory, pool, bob_id):
+    # Both uploads take the COPY path on one pinned connection; the staging
+    # table from the first is still alive when the second runs
+    first = make_coins(10, "BRONZE")
+    second = make_coins(10, "SILVER")
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            assert await inventory.upload_coins(bob_id, first, conn=conn) == 10
+            assert await inventory.upload_coins(bob_id, second, conn=conn) == 10
+
+    count = await inventory.get_inventory_count(bob_id)
+    assert count.bronze == 10
+    assert count.silver == 10
+
+
 async def test_upload_empty_list(inventory, bob_id):
     inserted = await inventory.upload_coins(bob_id, [])
     assert inserted == 0
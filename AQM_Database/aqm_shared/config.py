@@ -5,6 +5,13 @@ REDIS_PORT              = 6379
 REDIS_VAULT_DB          = 0          # Logical DB for Secure Vault
 REDIS_INVENTORY_DB      = 1          # Logical DB for Smart Inventory
 REDIS_SOCKET_TIMEOUT    = 5          # seconds
+REDIS_CONNECT_TIMEOUT   = 0.5        # seconds (TCP handshake only)
+REDIS_POOL_SIZE         = 16         # max connections per client pool
+REDIS_POOL_TIMEOUT      = 5          # seconds to wait for a free pooled connection
+REDIS_POOL_PREWARM      = 4          # connections opened + PINGed at startup
+REDIS_KEEPALIVE_IDLE    = 60         # seconds before the first TCP keepalive probe
+REDIS_VAULT_NAME        = "aqm-vault"      # CLIENT SETNAME, shown in CLIENT LIST
+REDIS_INVENTORY_NAME    = "aqm-inventory"
 REDIS_RETRY_ATTEMPTS    = 3
 REDIS_RETRY_DELAY       = 0.5       # seconds between retries
 
@@ -12,16 +19,31 @@ REDIS_RETRY_DELAY       = 0.5       # seconds between retries
 
 VAULT_KEY_PREFIX        = "vault:v1:key"        # vault:v1:key:{key_id}
 VAULT_STATS_KEY         = "vault:v1:stats"
-
-INV_KEY_PREFIX          = "inv:v1:key"           # inv:v1:key:{contact_id}:{key_id}
-INV_IDX_PREFIX          = "inv:v1:idx"           # inv:v1:idx:{contact_id}:{coin_category}
-INV_META_PREFIX         = "inv:v1:meta"          # inv:v1:meta:{contact_id}
+VAULT_ACTIVE_PREFIX     = "vault:v1:active"     # vault:v1:active:{coin_category} — Set of key_ids
+VAULT_ACTIVE_INDEXED_KEY = "vault:v1:active_indexed"  # marker: active sets backfilled from a SCAN
+
+# Inventory keys wrap contact_id in a Redis Cluster hash tag ("{...}") so all
+# keys for one contact land in the same slot and can be touched by one script.
+INV_KEY_PREFIX          = "inv:v2:key"           # inv:v2:key:{contact_id}:{key_id}
+INV_IDX_PREFIX          = "inv:v2:idx"           # inv:v2:idx:{contact_id}:{coin_category}
+INV_META_PREFIX         = "inv:v2:meta"          # inv:v2:meta:{contact_id}
+INV_CONTACTS_KEY        = "inv:v2:contacts"      # Set of registered contact_ids
+INV_CONTACTS_INDEXED_KEY = "inv:v2:contacts:indexed"  # marker: contacts set backfilled from meta
+
+# v1 layout (untagged contact_id, Hash entries) — read only by the one-time
+# migration into v2 (SmartInventory.migrate_legacy_keys)
+INV_V1_KEY_PREFIX       = "inv:v1:key"           # inv:v1:key:<contact_id>:<key_id>
+INV_V1_IDX_PREFIX       = "inv:v1:idx"           # inv:v1:idx:<contact_id>:<coin_category>
+INV_V1_META_PREFIX      = "inv:v1:meta"          # inv:v1:meta:<contact_id>
+INV_V1_MIGRATED_KEY     = "inv:v2:v1_migrated"   # marker: v1 data moved to v2
 
 # Vault Settings
 
 VAULT_KEY_TTL_SECONDS       = 2_592_000     # 30 days
 VAULT_BURN_GRACE_SECONDS    = 60            # keep burned key for 60s before hard delete
 VAULT_PURGE_MAX_AGE_DAYS    = 30
+VAULT_SCAN_COUNT            = 1000          # SCAN COUNT hint per server-side scan step
+VAULT_EXPIRY_EVENTS         = "Ex"          # notify-keyspace-events flags for the expiry listener
 
 # Inventory Budget Caps (from AQM paper Table 2)
 
@@ -36,6 +58,10 @@ BUDGET_CAPS = {
 INV_GC_INACTIVE_DAYS        = 30
 INV_MAX_STORAGE_BYTES       = 65_536        # 64 KB total budget for all cached keys
 INV_OPTIMISTIC_LOCK_RETRIES = 3
+INV_LAST_MSG_FLUSH_THRESHOLD    = 128       # buffered last_msg_at updates before a flush
+INV_LAST_MSG_FLUSH_INTERVAL_MS  = 1_000     # max age of the buffer before a flush
+INV_PRIORITY_CACHE_TTL          = 1.0       # seconds a cached contact priority stays valid
+INV_PRIORITY_CACHE_SIZE         = 8_192     # entries before the priority cache is reset
 
 # Coin Tier Fallback Order
 
@@ -55,6 +81,12 @@ TIER_CEILING = {
 # Numeric rank for tier comparison (used by ceiling logic)
 TIER_RANK = {"GOLD": 3, "SILVER": 2, "BRONZE": 1}
 
+# Tiers from most to least expensive (iteration order for per-tier loops)
+TIER_ORDER = ("GOLD", "SILVER", "BRONZE")
+
+# Numeric rank for priority comparison (higher = lower priority)
+PRIORITY_RANK = {"BESTIE": 0, "MATE": 1, "STRANGER": 2}
+
 # Valid Enums (for validation)
 
 VALID_COIN_CATEGORIES   = {"GOLD", "SILVER", "BRONZE"}
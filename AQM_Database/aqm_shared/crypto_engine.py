@@ -13,7 +13,9 @@ Backend priority:
 import os
 import uuid
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from typing import Optional
 
 from AQM_Database.aqm_shared import config
 from AQM_Database.aqm_shared.errors import InvalidCoinCategoryError
@@ -49,7 +51,7 @@ except ImportError:
 class CryptoEngine:
     """Key generation and signing engine with graceful backend fallback."""
 
-    def __init__(self):
+    def __init__(self, signing_seed: Optional[bytes] = None):
         if _HAS_OQS and _HAS_NACL:
             self._backend = "liboqs+pynacl"
         elif _HAS_NACL:
@@ -59,7 +61,10 @@ class CryptoEngine:
 
         # Persistent Ed25519 signing key (used for all signatures)
         if _HAS_NACL:
-            self._signing_key = nacl.signing.SigningKey.generate()
+            self._signing_key = (
+                nacl.signing.SigningKey(signing_seed) if signing_seed is not None
+                else nacl.signing.SigningKey.generate()
+            )
         else:
             self._signing_key = None
 
@@ -67,6 +72,11 @@ class CryptoEngine:
     def backend(self) -> str:
         return self._backend
 
+    @property
+    def signing_seed(self) -> Optional[bytes]:
+        """Seed of the Ed25519 signing key; rebuilds an engine that signs identically."""
+        return bytes(self._signing_key) if self._signing_key is not None else None
+
     def generate_keypair(self, coin_category: str) -> tuple[bytes, bytes]:
         """Generate (public_key, secret_key) bytes for the given coin tier.
 
@@ -178,3 +188,46 @@ def mint_coin(engine: CryptoEngine, coin_category: str) -> MintedCoinBundle:
         encryption_iv=iv,
         auth_tag=auth_tag,
     )
+
+
+# ─── Parallel minting ───
+
+# Below this many coins, spawning worker processes costs more than the
+# keygen they spread across cores (~0.1 ms per coin on pynacl).
+MINT_PARALLEL_THRESHOLD = 512
+
+_worker_engine: Optional[CryptoEngine] = None
+
+
+def _init_mint_worker(signing_seed: Optional[bytes]) -> None:
+    global _worker_engine
+    _worker_engine = CryptoEngine(signing_seed)
+
+
+def _mint_batch(coin_categories: list[str]) -> list[MintedCoinBundle]:
+    return [mint_coin(_worker_engine, c) for c in coin_categories]
+
+
+def mint_coins(
+    engine: CryptoEngine,
+    coin_categories: list[str],
+    max_workers: Optional[int] = None,
+) -> list[MintedCoinBundle]:
+    """Mint one coin per entry in `coin_categories`, preserving order.
+
+    Large batches are split across a process pool; each worker rebuilds the
+    engine from its signing seed, so every signature still comes from the
+    same Ed25519 key.
+    """
+    if len(coin_categories) < MINT_PARALLEL_THRESHOLD:
+        return [mint_coin(engine, c) for c in coin_categories]
+
+    workers = max_workers or os.cpu_count() or 1
+    step = -(-len(coin_categories) // workers)
+    batches = [coin_categories[i:i + step] for i in range(0, len(coin_categories), step)]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_mint_worker,
+        initargs=(engine.signing_seed,),
+    ) as pool:
+        return [bundle for batch in pool.map(_mint_batch, batches) for bundle in batch]
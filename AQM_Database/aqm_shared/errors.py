@@ -1,53 +1,73 @@
 class AQMDatabaseError(Exception):
+    # Subclasses keep their raw fields in args and format the message in
+    # __str__, so an exception that is caught and discarded never builds it.
     pass
 
 class VaultUnavailableError(AQMDatabaseError):
     def __init__(self , message):
-        message = f"Vault_error  = {message}"
+        self.message = message
         super().__init__(message)
 
+    def __str__(self):
+        return f"Vault_error  = {self.message}"
+
 class InventoryUnavailableError(AQMDatabaseError):
     def __init__(self , message):
-        message = f"Inventory_error  = {message}"
+        self.message = message
         super().__init__(message)
 
+    def __str__(self):
+        return f"Inventory_error  = {self.message}"
+
 class KeyAlreadyExistsError(AQMDatabaseError):
     def __init__(self , key):
         self.key = key
-        message = f"Key {key} already exists"
-        super().__init__(message)
+        super().__init__(key)
+
+    def __str__(self):
+        return f"Key {self.key} already exists"
 
 class InvalidCoinCategoryError(AQMDatabaseError):
     def __init__(self , category):
         self.category = category
-        message = f"Invalid Coin Category {category}"
-        super().__init__(message)
+        super().__init__(category)
+
+    def __str__(self):
+        return f"Invalid Coin Category {self.category}"
 
 class KeyNotFoundError(AQMDatabaseError):
     def __init__(self , key):
         self.key = key
-        message = f"Key {key} not found"
-        super().__init__(message)
+        super().__init__(key)
+
+    def __str__(self):
+        return f"Key {self.key} not found"
 
 class KeyAlreadyBurnedError(AQMDatabaseError):
     def __init__(self , key):
         self.key = key
-        message = f"Key {key} already burned"
-        super().__init__(message)
+        super().__init__(key)
+
+    def __str__(self):
+        return f"Key {self.key} already burned"
 
 
 class InvalidPriorityError(AQMDatabaseError):
     def __init__(self , priority):
         self.priority = priority
-        message = f"Invalid Priority {priority}"
-        super().__init__(message)
+        super().__init__(priority)
+
+    def __str__(self):
+        return f"Invalid Priority {self.priority}"
 
 
 class ContactNotRegisteredError(AQMDatabaseError):
     def __init__(self , contact_id):
         self.contact = contact_id
-        message = f"Contact {contact_id} not registered"
-        super().__init__(message)
+        super().__init__(contact_id)
+
+    def __str__(self):
+        return f"Contact {self.contact} not registered"
 
 
 class BudgetExceededError(AQMDatabaseError):
@@ -56,14 +76,20 @@ class BudgetExceededError(AQMDatabaseError):
         self.coin_category = coin_category
         self.current_count = current_count
         self.cap = cap
-        message = f"Budget exceeded for {contact_id}/{coin_category}: {current_count}/{cap}"
-        super().__init__(message)
+        super().__init__(contact_id, coin_category, current_count, cap)
+
+    def __str__(self):
+        return (f"Budget exceeded for {self.contact_id}/{self.coin_category}: "
+                f"{self.current_count}/{self.cap}")
 
 
 class ConcurrencyError(AQMDatabaseError):
     def __init__(self, operation):
-        message = f"Optimistic lock failed after max retries: {operation}"
-        super().__init__(message)
+        self.operation = operation
+        super().__init__(operation)
+
+    def __str__(self):
+        return f"Optimistic lock failed after max retries: {self.operation}"
 
 class ServerDatabaseError(Exception):
     pass
@@ -6,6 +6,7 @@ from AQM_Database.aqm_shared.crypto_engine import (
     CryptoEngine,
     MintedCoinBundle,
     mint_coin,
+    mint_coins,
     KYBER768_PK_SIZE,
     KYBER768_SK_SIZE,
     X25519_PK_SIZE,
@@ -132,3 +133,22 @@ def test_mint_coin_bundles_are_unique(engine):
     b2 = mint_coin(engine, "SILVER")
     assert b1.key_id != b2.key_id
     assert b1.public_key != b2.public_key
+
+
+# ─── mint_coins() ───
+
+def test_mint_coins_preserves_order(engine):
+    tiers = ["GOLD", "BRONZE", "SILVER", "BRONZE"]
+    bundles = mint_coins(engine, tiers)
+    assert [b.coin_category for b in bundles] == tiers
+
+
+def test_mint_coins_process_pool_signs_with_same_key(engine, monkeypatch):
+    from AQM_Database.aqm_shared import crypto_engine
+    monkeypatch.setattr(crypto_engine, "MINT_PARALLEL_THRESHOLD", 0)
+
+    tiers = ["SILVER", "BRONZE"] * 3
+    bundles = mint_coins(engine, tiers, max_workers=2)
+    assert [b.coin_category for b in bundles] == tiers
+    for b in bundles:
+        assert b.signature == engine.sign_key(b.public_key, b.coin_category)
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class VaultEntry:
     key_id:         str
     coin_category:  str
@@ -11,7 +11,7 @@ class VaultEntry:
     created_at:     int
     coin_version:   str
 
-@dataclass
+@dataclass(slots=True)
 class InventoryEntry:
     contact_id:     str
     key_id:         str
@@ -27,6 +27,13 @@ class ContactMeta:
     last_msg_at: int
     display_name: str
 
+@dataclass
+class ContactState:
+    meta:         ContactMeta
+    gold_count:   int
+    silver_count: int
+    bronze_count: int
+
 @dataclass
 class StorageReport:
     total_bytes: int
@@ -11,8 +11,11 @@ Data flow:
             → cache in SmartInventory (Redis db=1) via store_key()
 """
 
+from typing import Optional
 from uuid import UUID
 
+import asyncpg
+
 from AQM_Database.aqm_shared import config
 from AQM_Database.aqm_shared.types import CoinUpload, CoinRecord
 from AQM_Database.aqm_shared.errors import BudgetExceededError
@@ -28,13 +31,14 @@ async def fetch_and_cache(
     requester_id: UUID,
     coin_category: str,
     count: int,
+    conn: Optional[asyncpg.Connection] = None,
 ) -> list[CoinRecord]:
     """Fetch coins from the server and store them in local inventory.
 
     Returns the list of coins that were both fetched AND successfully cached.
     Coins that fail budget enforcement are silently skipped.
     """
-    coins = await server.fetch_coins(target_user_id, requester_id, coin_category, count)
+    coins = await server.fetch_coins(target_user_id, requester_id, coin_category, count, conn)
 
     cached = []
     for coin in coins:
@@ -57,13 +61,14 @@ async def upload_coins(
     server: CoinInventoryServer,
     user_id: UUID,
     coins: list[CoinUpload],
+    conn: Optional[asyncpg.Connection] = None,
 ) -> int:
     """Upload freshly minted public keys to the server.
 
     Called after minting; the private halves should already be in the vault.
     Returns count of coins actually inserted (duplicates silently skipped).
     """
-    return await server.upload_coins(user_id, coins)
+    return await server.upload_coins(user_id, coins, conn)
 
 
 async def sync_inventory(
@@ -93,7 +98,7 @@ async def sync_inventory(
     }
 
     fetched_counts = {}
-    for tier in ("GOLD", "SILVER", "BRONZE"):
+    for tier in config.TIER_ORDER:
         deficit = caps[tier] - current[tier]
         if deficit <= 0:
             fetched_counts[tier] = 0
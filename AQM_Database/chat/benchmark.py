@@ -190,15 +190,17 @@ async def _measure_aqm_tier(
         durations.append(elapsed_ms)
 
     # Cleanup
-    for t in ("GOLD", "SILVER", "BRONZE"):
-        inv_client.delete(f"{config.INV_IDX_PREFIX}:{contact_id}:{t}")
-    inv_client.delete(f"{config.INV_META_PREFIX}:{contact_id}")
+    inventory.flush()
+    for t in config.TIER_ORDER:
+        inv_client.delete(inventory._idx_key(contact_id, t))
+    inv_client.delete(inventory._meta_key(contact_id))
+    inv_client.srem(config.INV_CONTACTS_KEY, contact_id)
 
     cursor = 0
     while True:
         cursor, keys = inv_client.scan(
             cursor=cursor,
-            match=f"{config.INV_KEY_PREFIX}:{contact_id}:*",
+            match=inventory._inv_key(contact_id, "*"),
             count=100,
         )
         if keys:
@@ -218,6 +220,8 @@ async def _measure_aqm_tier(
         if cursor == 0:
             break
     vault_client.delete(config.VAULT_STATS_KEY)
+    for tier in config.TIER_ORDER:
+        vault_client.delete(vault._active_key(tier))
 
     async with server.pool.acquire() as conn:
         await conn.execute(
@@ -294,15 +298,17 @@ async def _measure_aqm_per_message(
         durations.append(elapsed_ms)
 
     # ─── Cleanup ───
+    inventory.flush()
     for cid in contact_ids:
-        for t in ("GOLD", "SILVER", "BRONZE"):
-            inv_client.delete(f"{config.INV_IDX_PREFIX}:{cid}:{t}")
-        inv_client.delete(f"{config.INV_META_PREFIX}:{cid}")
+        for t in config.TIER_ORDER:
+            inv_client.delete(inventory._idx_key(cid, t))
+        inv_client.delete(inventory._meta_key(cid))
+        inv_client.srem(config.INV_CONTACTS_KEY, cid)
         cursor = 0
         while True:
             cursor, keys = inv_client.scan(
                 cursor=cursor,
-                match=f"{config.INV_KEY_PREFIX}:{cid}:*",
+                match=inventory._inv_key(cid, "*"),
                 count=100,
             )
             if keys:
@@ -322,6 +328,8 @@ async def _measure_aqm_per_message(
         if cursor == 0:
             break
     vault_client.delete(config.VAULT_STATS_KEY)
+    for tier in config.TIER_ORDER:
+        vault_client.delete(vault._active_key(tier))
 
     async with server.pool.acquire() as conn:
         await conn.execute(
@@ -346,7 +354,7 @@ def format_benchmark_table(results: dict, per_msg_results: dict = None) -> str:
     D = Display
 
     col_w = 16
-    tiers = ["GOLD", "SILVER", "BRONZE"]
+    tiers = config.TIER_ORDER
     headers = ["Metric"] + [f"AQM {t}" for t in tiers] + ["TLS 1.3"]
 
     lines = []
@@ -443,7 +451,7 @@ async def run_benchmark(
     Display.arrow(f"Crypto backend: {engine.backend}")
     Display.arrow(f"Iterations per tier: {iterations}\n")
 
-    for tier in ("GOLD", "SILVER", "BRONZE"):
+    for tier in config.TIER_ORDER:
         Display.arrow(f"Benchmarking {Display.tier_label(tier)}…")
         durations = await _measure_aqm_tier(
             tier, vault, vault_client, inventory, inv_client,
@@ -464,7 +472,7 @@ async def run_benchmark(
     Display.arrow("Measures: select_coin + encrypt + decrypt + burn_key")
     Display.arrow(f"Iterations per tier: {iterations}\n")
 
-    for tier in ("GOLD", "SILVER", "BRONZE"):
+    for tier in config.TIER_ORDER:
         Display.arrow(f"Benchmarking {Display.tier_label(tier)} per-message…")
         durations = await _measure_aqm_per_message(
             tier, vault, vault_client, inventory, inv_client,
@@ -178,7 +178,7 @@ async def interactive_chat(user: str, partner: str, priority: str) -> None:
         print(f"  {D.DIM}Generating keypairs, storing private keys in vault,")
         print(f"  uploading public keys to PostgreSQL server…{D.RESET}")
         minted = await session.provision()
-        total_minted = sum(minted.get(t, 0) for t in ("GOLD", "SILVER", "BRONZE"))
+        total_minted = sum(minted.get(t, 0) for t in config.TIER_ORDER)
         print(f"  {D.GREEN}✓{D.RESET} Minted {D.BOLD}{total_minted}{D.RESET} coins "
               f"({D.YELLOW}G:{minted.get('GOLD', 0)}{D.RESET} "
               f"{D.WHITE}S:{minted.get('SILVER', 0)}{D.RESET} "
@@ -81,6 +81,7 @@ class ChatSession:
         self.engine = CryptoEngine()
         self.cm = ContextManager()
         self._owns_pool = False
+        self._expiry_listener = None
         self._on_receive: Optional[Callable[[str, str, str, bool], None]] = None
 
     async def setup(self) -> None:
@@ -99,7 +100,10 @@ class ChatSession:
 
         self.vault = SecureVault(self._vault_client)
         self.inventory = SmartInventory(self._inv_client)
+        self.inventory.migrate_legacy_keys()
         self.server = CoinInventoryServer(self._pool)
+        # Keeps the tier active sets in step with TTL expiries
+        self._expiry_listener = self.vault.start_expiry_listener()
 
         if self._transport is None:
             self._transport = ChatTransport()
@@ -113,18 +117,19 @@ class ChatSession:
         Returns dict of {tier: count_minted}.
         """
         all_uploads: list[CoinUpload] = []
+        vault_entries = []
         minted = {}
 
         for tier, count in MINT_PLAN:
             for _ in range(count):
                 bundle = mint_coin(self.engine, tier)
-                self.vault.store_key(
-                    key_id=bundle.key_id,
-                    coin_category=bundle.coin_category,
-                    encrypted_blob=bundle.encrypted_blob,
-                    encryption_iv=bundle.encryption_iv,
-                    auth_tag=bundle.auth_tag,
-                )
+                vault_entries.append((
+                    bundle.key_id,
+                    bundle.coin_category,
+                    bundle.encrypted_blob,
+                    bundle.encryption_iv,
+                    bundle.auth_tag,
+                ))
                 all_uploads.append(CoinUpload(
                     key_id=bundle.key_id,
                     coin_category=bundle.coin_category,
@@ -133,6 +138,7 @@ class ChatSession:
                 ))
             minted[tier] = count
 
+        self.vault.store_keys_bulk(vault_entries)
         await upload_coins(self.server, self.user_id, all_uploads)
 
         return minted
@@ -327,20 +333,22 @@ class ChatSession:
             if cursor == 0:
                 break
         self._vault_client.delete(config.VAULT_STATS_KEY)
+        for tier in config.TIER_ORDER:
+            self._vault_client.delete(self.vault._active_key(tier))
 
         # Clean inventory data for the partner contact
-        for tier in ("GOLD", "SILVER", "BRONZE"):
-            idx_key = f"{config.INV_IDX_PREFIX}:{self.partner_name}:{tier}"
-            self._inv_client.delete(idx_key)
-        meta_key = f"{config.INV_META_PREFIX}:{self.partner_name}"
-        self._inv_client.delete(meta_key)
+        self.inventory.flush()
+        for tier in config.TIER_ORDER:
+            self._inv_client.delete(self.inventory._idx_key(self.partner_name, tier))
+        self._inv_client.delete(self.inventory._meta_key(self.partner_name))
+        self._inv_client.srem(config.INV_CONTACTS_KEY, self.partner_name)
 
         # Clean any remaining inventory entry hashes
         cursor = 0
         while True:
             cursor, keys = self._inv_client.scan(
                 cursor=cursor,
-                match=f"{config.INV_KEY_PREFIX}:{self.partner_name}:*",
+                match=self.inventory._inv_key(self.partner_name, "*"),
                 count=100,
             )
             if keys:
@@ -360,12 +368,20 @@ class ChatSession:
         """Clean up connections."""
         if self._transport:
             self._transport.close()
+        if self._expiry_listener:
+            self._expiry_listener.stop()
+            self._expiry_listener = None
         if self._vault_client:
             self._vault_client.close()
-        if self._inv_client:
-            self._inv_client.close()
-        if self._owns_pool:
-            await close_pool()
+        try:
+            # A failed last_msg_at flush must not leak the client or pool
+            if self.inventory:
+                self.inventory.close()
+        finally:
+            if self._inv_client:
+                self._inv_client.close()
+            if self._owns_pool:
+                await close_pool()
 
 
 async def run_auto_demo() -> None:
@@ -380,10 +396,10 @@ async def run_auto_demo() -> None:
           f"    Two-User Chat Demo — Priority Scenarios"
           f"{Display.RESET}\n")
 
-    for priority in ("BESTIE", "MATE", "STRANGER"):
+    for priority in sorted(config.PRIORITY_RANK, key=config.PRIORITY_RANK.get):
         ceiling = config.TIER_CEILING[priority]
         Display.phase_header(
-            ["BESTIE", "MATE", "STRANGER"].index(priority) + 1,
+            config.PRIORITY_RANK[priority] + 1,
             f"Priority: {priority}  (ceiling: {ceiling})",
         )
 
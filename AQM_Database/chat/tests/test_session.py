@@ -15,7 +15,7 @@ from AQM_Database.aqm_shared.context_manager import (
     SCENARIO_A, SCENARIO_B, SCENARIO_C,
 )
 from AQM_Database.aqm_shared.types import CoinUpload
-from AQM_Database.aqm_shared import config
+from AQM_Database.aqm_shared import config, errors
 from AQM_Database.aqm_db.vault import SecureVault
 from AQM_Database.aqm_db.inventory import SmartInventory
 from AQM_Database.bridge import upload_coins, fetch_and_cache
@@ -464,3 +464,23 @@ async def test_cleanup_user_data(fake_vault_client, fake_inv_client, server, pg_
     assert stats.active_gold == 0
     assert stats.active_silver == 0
     assert stats.active_bronze == 0
+
+
+async def test_teardown_closes_clients_when_flush_fails(fake_vault_client, fake_inv_client, monkeypatch):
+    session = ChatSession(
+        "alice", "bob", "BESTIE",
+        vault_client=fake_vault_client,
+        inv_client=fake_inv_client,
+    )
+    session.inventory = SmartInventory(fake_inv_client)
+
+    def failing_close():
+        raise errors.InventoryUnavailableError("flush")
+
+    closed = []
+    monkeypatch.setattr(session.inventory, "close", failing_close)
+    monkeypatch.setattr(fake_inv_client, "close", lambda: closed.append(True))
+
+    with pytest.raises(errors.InventoryUnavailableError):
+        await session.teardown()
+    assert closed == [True]
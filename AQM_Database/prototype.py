@@ -11,7 +11,7 @@ Run:
 import asyncio
 import uuid
 
-from AQM_Database.aqm_shared.crypto_engine import CryptoEngine, mint_coin
+from AQM_Database.aqm_shared.crypto_engine import CryptoEngine, mint_coins
 from AQM_Database.aqm_shared.context_manager import (
     ContextManager,
     SCENARIO_A,
@@ -79,21 +79,17 @@ class Display:
 
     @classmethod
     def table(cls, headers: list[str], rows: list[list], col_width: int = 14) -> None:
-        header_line = "".join(f"{h:<{col_width}}" for h in headers)
-        print(f"\n  {cls.BOLD}{header_line}{cls.RESET}")
+        fmt = f"{{:<{col_width}}}" * len(headers)
+        print(f"\n  {cls.BOLD}{fmt.format(*headers)}{cls.RESET}")
         print(f"  {'─' * (col_width * len(headers))}")
         for row in rows:
-            cells = []
-            for i, cell in enumerate(row):
-                s = str(cell)
-                # Color tier names
-                if s in cls.TIER_COLORS:
-                    s = cls.tier_label(s)
-                    # Pad accounting for ANSI escape chars
-                    cells.append(s + " " * max(0, col_width - len(str(cell))))
-                else:
-                    cells.append(f"{s:<{col_width}}")
-            print(f"  {''.join(cells)}")
+            cells = [str(cell) for cell in row]
+            line = fmt.format(*cells)
+            # Color tier cells after padding, so escapes don't skew the widths
+            for tier in cls.TIER_COLORS.keys() & cells:
+                padded = f"{tier:<{col_width}}"
+                line = line.replace(padded, cls.tier_label(tier) + padded[len(tier):])
+            print(f"  {line}")
         print()
 
     @classmethod
@@ -128,20 +124,25 @@ async def phase1_mint(engine: CryptoEngine, vault: SecureVault, server: CoinInve
     Display.arrow(f"Crypto backend: {engine.backend}")
 
     all_uploads: list[CoinUpload] = []
+    vault_entries = []
+
+    # Keygen for the whole plan up front (fans out across cores when large)
+    bundles = iter(mint_coins(engine, [tier for tier, count in MINT_PLAN for _ in range(count)]))
 
     for tier, count in MINT_PLAN:
-        Display.section(f"Minting {count}× {tier}")
+        # Coin size is fixed per tier, so report it once rather than per coin
+        Display.section(f"Minting {count}× {tier}  ({config.COIN_SIZE_BYTES[tier]}B pk+sig per coin)")
         for i in range(count):
-            bundle = mint_coin(engine, tier)
-
-            # Store private key in vault
-            vault.store_key(
-                key_id=bundle.key_id,
-                coin_category=bundle.coin_category,
-                encrypted_blob=bundle.encrypted_blob,
-                encryption_iv=bundle.encryption_iv,
-                auth_tag=bundle.auth_tag,
-            )
+            bundle = next(bundles)
+
+            # Queue private key for the vault
+            vault_entries.append((
+                bundle.key_id,
+                bundle.coin_category,
+                bundle.encrypted_blob,
+                bundle.encryption_iv,
+                bundle.auth_tag,
+            ))
 
             # Prepare public key for server upload
             all_uploads.append(CoinUpload(
@@ -151,21 +152,24 @@ async def phase1_mint(engine: CryptoEngine, vault: SecureVault, server: CoinInve
                 signature_blob=bundle.signature,
             ))
 
-            Display.success(
-                f"[{i+1}/{count}] {Display.tier_label(tier)}  "
-                f"id={bundle.key_id[:8]}…  pk={len(bundle.public_key)}B  "
-                f"sk→vault={len(bundle.encrypted_blob)}B"
-            )
+            Display.success(f"[{i+1}/{count}] {Display.tier_label(tier)}  id={bundle.key_id[:8]}…")
 
-    # Upload all public keys to server
-    Display.section("Uploading public keys to server")
-    inserted = await upload_coins(server, BOB_USER_ID, all_uploads)
-    Display.success(f"Uploaded {inserted} coins to PostgreSQL")
+    # Store all private keys in one batch
+    Display.section("Storing private keys in vault")
+    stored = vault.store_keys_bulk(vault_entries)
+    Display.success(f"Stored {stored} private keys in vault")
 
-    # Show stats
-    Display.section("Post-mint state")
-    stats = vault.get_stats()
-    srv_inv = await server.get_inventory_count(BOB_USER_ID)
+    # One server connection for the rest of the phase
+    async with server.pool.acquire() as conn:
+        # Upload all public keys to server
+        Display.section("Uploading public keys to server")
+        inserted = await upload_coins(server, BOB_USER_ID, all_uploads, conn)
+        Display.success(f"Uploaded {inserted} coins to PostgreSQL")
+
+        # Show stats
+        Display.section("Post-mint state")
+        stats = vault.get_stats()
+        srv_inv = await server.get_inventory_count(BOB_USER_ID, conn)
 
     Display.table(
         ["Store", "Gold", "Silver", "Bronze"],
@@ -189,15 +193,17 @@ async def phase2_prefetch(inventory: SmartInventory, server: CoinInventoryServer
     caps = config.BUDGET_CAPS["BESTIE"]
     Display.arrow(f"Budget caps: G={caps['GOLD']} S={caps['SILVER']} B={caps['BRONZE']}")
 
-    # Fetch & cache for each tier
-    for tier in ("GOLD", "SILVER", "BRONZE"):
-        want = caps[tier]
-        if want == 0:
-            continue
-        cached = await fetch_and_cache(
+    # Fetch & cache all tiers concurrently. Each fetch borrows its own pool
+    # connection — one asyncpg connection can't run queries in parallel.
+    tiers = [(tier, caps[tier]) for tier in config.TIER_ORDER if caps[tier] > 0]
+    results = await asyncio.gather(*(
+        fetch_and_cache(
             server, inventory, BOB_CONTACT_ID,
             BOB_USER_ID, ALICE_USER_ID, tier, want,
         )
+        for tier, want in tiers
+    ))
+    for (tier, _), cached in zip(tiers, results):
         Display.success(f"Fetched {len(cached)}× {Display.tier_label(tier)} → local inventory")
 
     # Show inventory
@@ -275,11 +281,11 @@ def phase4_decrypt_burn(vault: SecureVault, selected_keys: list):
     target = selected_keys[0]
     Display.arrow(f"Target key: {target.key_id[:12]}…  tier={Display.tier_label(target.coin_category)}")
 
-    # Fetch from vault
-    entry = vault.fetch_key(target.key_id)
+    # Fetch from vault — only the fields shown below
+    entry = vault.fetch_key(target.key_id, fields=(b"status", b"encrypted_blob"))
     if entry:
-        Display.success(f"Private key retrieved from vault — status={entry.status}")
-        Display.stat_row("Encrypted blob:", f"{len(entry.encrypted_blob)} bytes")
+        Display.success(f"Private key retrieved from vault — status={entry[b'status'].decode()}")
+        Display.stat_row("Encrypted blob:", f"{len(entry[b'encrypted_blob'])} bytes")
     else:
         Display.arrow("Key not found in vault (may have been minted by a different party)")
         return
@@ -289,11 +295,11 @@ def phase4_decrypt_burn(vault: SecureVault, selected_keys: list):
     Display.success("Key BURNED — marked for deletion")
 
     # Verify it's gone
-    after = vault.fetch_key(target.key_id)
+    after = vault.fetch_key(target.key_id, fields=(b"status",))
     if after is None:
         Display.success("Verification: fetch_key() returns None — burn confirmed")
     else:
-        Display.arrow(f"WARNING: key still accessible (status={after.status})")
+        Display.arrow(f"WARNING: key still accessible (status={after[b'status'].decode()})")
 
     # Final stats
     Display.section("Final vault state")
@@ -333,6 +339,9 @@ async def main():
     async with pool.acquire() as conn:
         await conn.execute("DELETE FROM coin_inventory WHERE user_id = $1", BOB_USER_ID)
 
+    # Keeps the tier active sets in step with TTL expiries
+    expiry_listener = vault.start_expiry_listener()
+
     Display.success("Infrastructure ready\n")
 
     # ─── Initialize engines ───
@@ -356,10 +365,24 @@ async def main():
         print(f"\n{Display.GREEN}{Display.BOLD}  ══ Demo complete ══{Display.RESET}\n")
 
     finally:
+        expiry_listener.stop()
+        inventory.close()
         vault_client.close()
         inv_client.close()
         await close_pool()
 
 
+def run():
+    """Run main() on uvloop when it is installed, else on stdlib asyncio."""
+    # uvloop is optional: faster event loop for the asyncpg/socket traffic,
+    # stdlib asyncio where it isn't installed (e.g. Windows).
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()
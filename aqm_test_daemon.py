@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+AQM Test Daemon — keeps a warm pytest process for repeated test runs.
+
+Usage:
+    python demo.py --tests-watch    Start the daemon (Ctrl-C / SIGTERM stops it)
+    python demo.py --tests          Uses the daemon when it is running
+
+The daemon imports pytest, its plugins and the heavy third-party packages
+once, then forks a child per request. The child runs pytest.main with the
+requested arguments, writing into the output file descriptor the client
+passed over the socket, and replies with the exit code. AQM code is never
+imported in the daemon itself, so every run sees the current sources.
+
+A request is refused unless the client runs the same interpreter from the
+same directory the daemon was started in, so a daemon left running for
+another virtualenv or checkout never tests the wrong code. The socket is
+created owner-only (0600) — anyone who can connect can run pytest.
+"""
+
+import os
+import sys
+import json
+import signal
+import socket
+import importlib
+import traceback
+
+SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".aqm", "test.sock")
+
+# Imported once in the daemon so forked runs start warm
+PRELOAD = ["pytest", "redis", "fakeredis", "asyncpg", "nacl"]
+
+MAX_REQUEST = 64 * 1024
+
+
+class RequestRefused(OSError):
+    """The daemon serves a different interpreter or checkout than the client."""
+
+
+def submit(args, env, output, path=SOCKET_PATH):
+    """Run pytest `args` in the daemon with output to the `output` file.
+
+    `env` replaces the run's whole environment. Returns a connected socket;
+    `wait(sock)` yields the exit code. Raises OSError when no daemon is
+    listening, RequestRefused when it serves another interpreter or checkout.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        request = json.dumps({
+            "args": args,
+            "env": env,
+            "cwd": os.getcwd(),
+            "executable": sys.executable,
+        }).encode()
+        socket.send_fds(sock, [request], [output.fileno()])
+        ack = _read_line(sock)
+        if ack != "ok":
+            raise RequestRefused(ack or "test daemon closed the connection")
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def wait(sock):
+    """Block until the submitted run finishes; returns pytest's exit code."""
+    with sock:
+        line = _read_line(sock)
+    return int(line) if line else 1
+
+
+def _read_line(sock):
+    """Read one newline-terminated reply without buffering past it."""
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = sock.recv(1)
+        if not chunk:
+            break
+        data += chunk
+    return data.decode().strip()
+
+
+def _refusal(request):
+    """Why this daemon must not serve `request`, or None when it may."""
+    if request.get("executable") != sys.executable:
+        return (f"refused: daemon runs {sys.executable}, "
+                f"client runs {request.get('executable')}")
+    if request.get("cwd") != os.getcwd():
+        return f"refused: daemon serves {os.getcwd()}, client is in {request.get('cwd')}"
+    return None
+
+
+def _run_request(conn):
+    """Child side: check and apply the request, run pytest, report the exit code."""
+    import pytest
+
+    data, fds, _, _ = socket.recv_fds(conn, MAX_REQUEST, 1)
+    request = json.loads(data)
+    refusal = _refusal(request)
+    if refusal:
+        for fd in fds:
+            os.close(fd)
+        conn.sendall(f"{refusal}\n".encode())
+        return
+    conn.sendall(b"ok\n")
+    os.environ.clear()
+    os.environ.update(request["env"])
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.dup2(fds[0], 1)
+    os.dup2(fds[0], 2)
+    os.close(fds[0])
+
+    rc = int(pytest.main(request["args"]))
+    sys.stdout.flush()
+    sys.stderr.flush()
+    conn.sendall(f"{rc}\n".encode())
+
+
+def serve(path=SOCKET_PATH):
+    """Accept run requests until SIGINT/SIGTERM; each runs in a forked child."""
+    for module in PRELOAD:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    if os.path.exists(path):
+        os.unlink(path)
+
+    # Owner-only from the moment it exists, not chmod-ed after a window
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    server.listen()
+
+    # Children are reaped automatically; SIGTERM unwinds through the finally
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    print(f"  AQM test daemon listening on {path} for {os.getcwd()}", flush=True)
+    try:
+        while True:
+            conn, _ = server.accept()
+            if os.fork() == 0:
+                server.close()
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                code = 0
+                try:
+                    _run_request(conn)
+                except BaseException:
+                    traceback.print_exc()
+                    code = 1
+                finally:
+                    os._exit(code)
+            conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
+        print("  AQM test daemon stopped", flush=True)
+
+
+if __name__ == "__main__":
+    serve()
@@ -5,8 +5,10 @@ AQM Demo Runner — Preflight checks + prototype execution.
 Usage:
     python demo.py              Run the full 4-phase lifecycle demo
     python demo.py --check      Only run preflight checks, don't start demo
-    python demo.py --tests      Run the full test suite (171 tests)
+    python demo.py --tests      Run the full test suite
     python demo.py --all        Run tests first, then demo
+    python demo.py --tests --verbose-tests  Show one line per test
+    python demo.py --tests-watch  Keep a warm test daemon for repeated --tests runs
     python demo.py --chat       Run two-user chat demo (all priority scenarios)
     python demo.py --demo-pair  Launch two terminals for interactive chat (default: BESTIE)
     python demo.py --demo-pair --priority MATE     Demo with MATE priority
@@ -18,96 +20,359 @@ Requires:
     - Docker containers running:  cd AQM_Database && docker compose up -d
 """
 
+import os
 import sys
+import json
+import time
+import select
+import hashlib
+import socket
+import struct
+import asyncio
 import argparse
+import tempfile
+import threading
+import importlib
+import importlib.util
+import importlib.machinery
 import subprocess
-import socket
 
-# ─── ANSI helpers ───
+import aqm_test_daemon
 
-RESET  = "\033[0m"
-BOLD   = "\033[1m"
-DIM    = "\033[2m"
-RED    = "\033[91m"
-GREEN  = "\033[92m"
-YELLOW = "\033[93m"
-CYAN   = "\033[96m"
+# ─── ANSI helpers ───
 
-def ok(msg):   print(f"  {GREEN}✓{RESET} {msg}")
-def fail(msg): print(f"  {RED}✗{RESET} {msg}")
-def info(msg): print(f"  {CYAN}→{RESET} {msg}")
-def warn(msg): print(f"  {YELLOW}!{RESET} {msg}")
+# Escape codes only when writing to a terminal; piped/CI logs stay plain
+if sys.stdout.isatty():
+    RESET  = "\033[0m"
+    BOLD   = "\033[1m"
+    DIM    = "\033[2m"
+    RED    = "\033[91m"
+    GREEN  = "\033[92m"
+    YELLOW = "\033[93m"
+    CYAN   = "\033[96m"
+else:
+    RESET = BOLD = DIM = RED = GREEN = YELLOW = CYAN = ""
+
+_OK   = f"  {GREEN}✓{RESET} "
+_FAIL = f"  {RED}✗{RESET} "
+_INFO = f"  {CYAN}→{RESET} "
+_WARN = f"  {YELLOW}!{RESET} "
+
+def ok(msg):   print(_OK + msg)
+def fail(msg): print(_FAIL + msg)
+def info(msg): print(_INFO + msg)
+def warn(msg): print(_WARN + msg)
 
 
 # ─── Preflight checks ───
 
-def check_port(host, port, label):
-    """Check if a TCP port is accepting connections."""
+# Localhost Docker answers a connect in well under a millisecond; raise via
+# AQM_PROBE_TIMEOUT (seconds) when the services run on a remote Docker host.
+PROBE_TIMEOUT = float(os.environ.get("AQM_PROBE_TIMEOUT", "0.2"))
+
+# l_onoff=1, l_linger=0: close() sends RST, so probes leave no TIME_WAIT behind
+_LINGER_RESET = struct.pack("ii", 1, 0)
+
+
+# Probe results are reused for this long within one run, so the test runner
+# does not reconnect to a port preflight has just checked
+PORT_CACHE_TTL = 5.0
+_PORT_CACHE: dict[tuple[str, int], tuple[bool, float]] = {}
+
+
+def _cached_port(host, port):
+    """Recent probe result for host:port, or None if there is none."""
+    hit = _PORT_CACHE.get((host, port))
+    if hit and time.monotonic() - hit[1] < PORT_CACHE_TTL:
+        return hit[0]
+    return None
+
+
+def _remember_port(host, port, up):
+    _PORT_CACHE[(host, port)] = (up, time.monotonic())
+    return up
+
+
+def _probe(host, port):
+    """Non-blocking TCP connect bounded by PROBE_TIMEOUT; True if it completes."""
+    cached = _cached_port(host, port)
+    if cached is not None:
+        return cached
     try:
-        with socket.create_connection((host, port), timeout=2):
-            ok(f"{label} is reachable at {host}:{port}")
-            return True
-    except (ConnectionRefusedError, TimeoutError, OSError):
-        fail(f"{label} is NOT reachable at {host}:{port}")
-        return False
+        addr = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)[0][4]
+    except OSError:
+        return _remember_port(host, port, False)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setblocking(False)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RESET)
+        sock.connect_ex(addr)
+        _, writable, _ = select.select([], [sock], [], PROBE_TIMEOUT)
+        up = bool(writable) and sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+        return _remember_port(host, port, up)
+    finally:
+        sock.close()
+
+
+async def acheck_port(host, port):
+    """Probe a TCP port without blocking the loop; True if it accepts a connection."""
+    cached = _cached_port(host, port)
+    if cached is not None:
+        return cached
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, family=socket.AF_INET), timeout=PROBE_TIMEOUT,
+        )
+    except (asyncio.TimeoutError, OSError):
+        return _remember_port(host, port, False)
+    writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RESET)
+    writer.close()
+    return _remember_port(host, port, True)
+
+
+# Run in a child interpreter: imports each module named in argv and prints
+# a JSON map of module -> error message (null on success)
+_IMPORT_CHECK = """\
+import importlib, json, sys
+errors = {}
+for name in sys.argv[1:]:
+    try:
+        importlib.import_module(name)
+        errors[name] = None
+    except Exception as e:
+        errors[name] = str(e) or type(e).__name__
+print(json.dumps(errors))
+"""
 
 
-def check_import(module, label):
-    """Check if a Python module can be imported."""
+async def acheck_imports(modules):
+    """Import modules in one child process; returns None or an error message per module.
+
+    Heavy C-extension imports run there in parallel with this process instead
+    of contending for its GIL, and the .pyc files they write warm later imports.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", _IMPORT_CHECK, *modules,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL, close_fds=False,
+    )
+    stdout, _ = await proc.communicate()
     try:
-        __import__(module)
+        errors = json.loads(stdout)
+    except ValueError:
+        return [f"import check exited with code {proc.returncode}"] * len(modules)
+    return [errors.get(m) for m in modules]
+
+
+PACKAGES = [
+    ("redis", "redis-py"),
+    ("asyncpg", "asyncpg"),
+    ("fakeredis", "fakeredis"),
+    ("nacl", "pynacl"),
+]
+
+SERVICES = [
+    ("localhost", 6379, "Redis"),
+    ("localhost", 5433, "PostgreSQL"),
+]
+
+AQM_MODULES = [
+    ("AQM_Database.aqm_db.vault", "SecureVault"),
+    ("AQM_Database.aqm_db.inventory", "SmartInventory"),
+    ("AQM_Database.aqm_server.coin_inventory", "CoinInventoryServer"),
+    ("AQM_Database.bridge", "Bridge"),
+    ("AQM_Database.aqm_shared.crypto_engine", "CryptoEngine"),
+    ("AQM_Database.aqm_shared.context_manager", "ContextManager"),
+]
+
+
+def find_module(module):
+    """Locate a module without executing it; returns None if found, else the ImportError."""
+    try:
+        if importlib.util.find_spec(module) is None:
+            return ModuleNotFoundError(f"No module named '{module}'")
+    except ImportError as e:
+        return e
+    return None
+
+
+def check_aqm_modules(names):
+    """Locate AQM submodules in one pass; returns a found/not-found bool per name.
+
+    The AQM_Database spec is resolved once and each child is looked up only in
+    its parent's __path__, so no package __init__ runs and sys.path is not
+    re-walked per module.
+    """
+    search_paths = {}
+
+    def locations(package):
+        if package not in search_paths:
+            parent, _, leaf = package.rpartition(".")
+            if parent:
+                parent_path = locations(parent)
+                spec = importlib.machinery.PathFinder.find_spec(leaf, parent_path) if parent_path else None
+            else:
+                spec = importlib.util.find_spec(package)
+            search_paths[package] = spec.submodule_search_locations if spec else None
+        return search_paths[package]
+
+    found = []
+    for name in names:
+        parent, _, leaf = name.rpartition(".")
+        parent_path = locations(parent)
+        found.append(parent_path is not None
+                     and importlib.machinery.PathFinder.find_spec(leaf, parent_path) is not None)
+    return found
+
+
+async def _run_checks():
+    """Run every preflight probe concurrently; results come back grouped in order."""
+    return await asyncio.gather(
+        acheck_imports([m for m, _ in PACKAGES] + ["oqs", "hiredis"]),
+        asyncio.gather(*(acheck_port(h, p) for h, p, _ in SERVICES)),
+    )
+
+
+def _report_import(error, label):
+    if error is None:
         ok(f"{label} importable")
         return True
-    except ImportError as e:
-        fail(f"{label} import failed: {e}")
-        return False
+    fail(f"{label} import failed: {error}")
+    return False
+
+
+def _report_port(reachable, host, port, label):
+    if reachable:
+        ok(f"{label} is reachable at {host}:{port}")
+    else:
+        fail(f"{label} is NOT reachable at {host}:{port}")
+    return reachable
+
 
+# A passing preflight is remembered briefly so back-to-back runs in one dev
+# session skip the probes. Only passes are stored; any failure re-probes.
+PREFLIGHT_CACHE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "aqm", "preflight.json",
+)
+PREFLIGHT_CACHE_TTL = 60  # seconds
 
-def preflight():
-    """Run all preflight checks. Returns True if everything passes."""
+
+def _preflight_cache_key():
+    """Changes whenever the interpreter, a checked package, or a service endpoint does."""
+    from importlib.metadata import version, PackageNotFoundError
+    parts = [sys.version]
+    for dist in ("redis", "asyncpg", "fakeredis", "pynacl"):
+        try:
+            parts.append(f"{dist}={version(dist)}")
+        except PackageNotFoundError:
+            parts.append(f"{dist}=-")
+    parts.extend(f"{host}:{port}" for host, port, _ in SERVICES)
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def _preflight_cache_load():
+    """Return the cache age in seconds if a fresh, matching pass is on disk."""
+    try:
+        age = time.time() - os.path.getmtime(PREFLIGHT_CACHE)
+        if age >= PREFLIGHT_CACHE_TTL:
+            return None
+        with open(PREFLIGHT_CACHE) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("key") != _preflight_cache_key() or not cached.get("passed"):
+        return None
+    return age
+
+
+def _preflight_cache_save(passed):
+    try:
+        if not passed:
+            os.remove(PREFLIGHT_CACHE)
+            return
+        os.makedirs(os.path.dirname(PREFLIGHT_CACHE), exist_ok=True)
+        with open(PREFLIGHT_CACHE, "w") as f:
+            json.dump({"key": _preflight_cache_key(), "passed": True}, f)
+    except OSError:
+        pass
+
+
+def _prefetch_import(module):
+    """Start importing `module` on a daemon thread; the later real import joins it.
+
+    Failures are dropped here — a failed import leaves nothing in sys.modules,
+    so the real import raises the error itself.
+    """
+    def load():
+        try:
+            importlib.import_module(module)
+        except Exception:
+            pass
+
+    threading.Thread(target=load, name=f"prefetch-{module}", daemon=True).start()
+
+
+def preflight(use_cache=True, prefetch=None):
+    """Run all preflight checks. Returns True if everything passes.
+
+    With use_cache, a pass recorded less than PREFLIGHT_CACHE_TTL seconds ago
+    is reused instead of probing again. `prefetch` names the module the run
+    will import next; it is imported in the background while the probes wait.
+    """
     print(f"\n{CYAN}{BOLD}  Preflight Checks{RESET}")
     print(f"  {'─' * 40}\n")
 
+    if use_cache:
+        age = _preflight_cache_load()
+        if age is not None:
+            ok(f"{BOLD}Preflight passed {age:.0f}s ago — skipping checks{RESET} {DIM}(--check to re-run){RESET}")
+            print()
+            return True
+
+    if prefetch:
+        _prefetch_import(prefetch)
+
+    # Probes run concurrently; output below keeps the sequential layout
+    import_errors, reachable = asyncio.run(_run_checks())
+    pkg_errors = import_errors[:len(PACKAGES)]
+    oqs_error, hiredis_error = import_errors[len(PACKAGES):]
+
     results = []
 
     # Python packages
     info("Checking Python packages…")
-    results.append(check_import("redis", "redis-py"))
-    results.append(check_import("asyncpg", "asyncpg"))
-    results.append(check_import("fakeredis", "fakeredis"))
-    results.append(check_import("nacl", "pynacl"))
+    for (_, label), error in zip(PACKAGES, pkg_errors):
+        results.append(_report_import(error, label))
 
     # Optional PQC backend
-    try:
-        __import__("oqs")
+    if oqs_error is None:
         ok("liboqs-python importable (full post-quantum)")
-    except ImportError:
+    else:
         warn("liboqs-python not found — Kyber-768 will use urandom mock (OK for demo)")
 
+    # Optional C RESP parser — redis-py selects it automatically when present
+    if hiredis_error is None:
+        ok("hiredis importable (C RESP parser)")
+    else:
+        warn("hiredis not found — redis-py will parse RESP in pure Python (slower)")
+
     print()
 
     # Infrastructure
     info("Checking Docker services…")
-    results.append(check_port("localhost", 6379, "Redis"))
-    results.append(check_port("localhost", 5433, "PostgreSQL"))
+    for (host, port, label), up in zip(SERVICES, reachable):
+        results.append(_report_port(up, host, port, label))
 
     print()
 
-    # AQM package
+    # AQM package — located only; the demo runner imports what it uses
     info("Checking AQM package…")
-    results.append(check_import("AQM_Database.aqm_db.vault", "SecureVault"))
-    results.append(check_import("AQM_Database.aqm_db.inventory", "SmartInventory"))
-    results.append(check_import("AQM_Database.aqm_server.coin_inventory", "CoinInventoryServer"))
-    results.append(check_import("AQM_Database.bridge", "Bridge"))
-    results.append(check_import("AQM_Database.aqm_shared.crypto_engine", "CryptoEngine"))
-    results.append(check_import("AQM_Database.aqm_shared.context_manager", "ContextManager"))
-
-    print()
-
-    # Crypto backend summary
-    from AQM_Database.aqm_shared.crypto_engine import CryptoEngine
-    engine = CryptoEngine()
-    info(f"Crypto backend: {BOLD}{engine.backend}{RESET}")
+    found = check_aqm_modules([module for module, _ in AQM_MODULES])
+    for (module, label), present in zip(AQM_MODULES, found):
+        if present:
+            ok(f"{label} found")
+        else:
+            fail(f"{label} not found: no module named '{module}'")
+        results.append(present)
 
     print()
     all_ok = all(results)
@@ -117,62 +382,191 @@ def preflight():
         fail(f"{BOLD}Some checks failed — fix the issues above before running the demo{RESET}")
 
     print()
+    _preflight_cache_save(all_ok)
     return all_ok
 
 
 # ─── Test runner ───
 
-def run_tests():
-    """Run the full test suite across all three packages."""
+SUITES = [
+    ("Shared (crypto + context)", "AQM_Database/aqm_shared/tests/", False),
+    ("Redis (vault + inventory + gc)", "AQM_Database/aqm_db/tests/", False),
+    ("Test daemon (--tests-watch)", "tests/", False),
+    ("Server (PostgreSQL + bridge)", "AQM_Database/aqm_server/tests/", True),
+    ("Chat (protocol + session + benchmark)", "AQM_Database/chat/tests/", True),
+]
+
+
+def _pytest_args(path, parallel, verbose=False):
+    """pytest arguments for one suite.
+
+    `parallel` adds xdist's `-n auto` when pytest-xdist is installed.
+    Plugin autoloading is off, so the plugins the suites need are named here.
+    """
+    args = [path, "--tb=short", *(("-v",) if verbose else ("-q", "--no-summary")), "--no-header",
+            "--import-mode=importlib", "-o", f"testpaths={path}",
+            "-p", "pytest_asyncio.plugin"]
+    if parallel and find_module("xdist") is None:
+        args += ["-p", "xdist.plugin", "-n", "auto"]
+    return args
+
+
+def _pytest_env():
+    return {"PYTEST_DISABLE_PLUGIN_AUTOLOAD": "1"}
+
+
+class _DaemonRun:
+    """Popen-like handle for a run submitted to the test daemon."""
+
+    def __init__(self, sock):
+        self._sock = sock
+        self.returncode = None
+
+    def wait(self):
+        if self.returncode is None:
+            self.returncode = aqm_test_daemon.wait(self._sock)
+        return self.returncode
+
+
+def _daemon_running():
+    return hasattr(socket, "send_fds") and os.path.exists(aqm_test_daemon.SOCKET_PATH)
+
+
+def _start_suite(path, parallel, verbose=False):
+    """Launch one pytest run with output buffered to a temp file; returns (file, proc).
+
+    Runs go to the test daemon (--tests-watch) when one is listening,
+    otherwise to a fresh pytest subprocess.
+    """
+    args = _pytest_args(path, parallel, verbose)
+    env = {**os.environ, **_pytest_env()}
+    output = tempfile.TemporaryFile()
+    if _daemon_running():
+        try:
+            return output, _DaemonRun(aqm_test_daemon.submit(args, env, output))
+        except OSError:
+            pass  # stale socket or another checkout's daemon — use a subprocess
+    # close_fds=False keeps Popen on its posix_spawn fast path (Linux/macOS);
+    # Python opens fds non-inheritable anyway, so nothing extra leaks
+    proc = subprocess.Popen([sys.executable, "-m", "pytest", *args],
+                            stdout=output, stderr=subprocess.STDOUT, close_fds=False,
+                            env=env)
+    return output, proc
+
+
+def _run_suite_inline(path, parallel, verbose=False):
+    """Run one pytest suite in this process, skipping interpreter and pytest boot."""
+    import pytest
+
+    env = _pytest_env()
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        return int(pytest.main(_pytest_args(path, parallel, verbose)))
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def run_tests(verbose=False, inline_last=False):
+    """Run the full test suite: every package plus the test daemon.
+
+    With inline_last, the last suite runs in this process via pytest.main.
+    Only pass it when nothing else runs afterwards: the suite leaves its
+    imports, Redis pools and event-loop state behind.
+
+    Plugin autoloading is off: only pytest-asyncio (and pytest-xdist when
+    installed) load. Other locally installed plugins, pytest-cov included,
+    are disabled, so these runs collect no coverage.
+    """
+    # Block-buffer stdout for the run; each suite's output is flushed in one go
+    line_buffering = sys.stdout.line_buffering
+    sys.stdout.reconfigure(line_buffering=False)
+    try:
+        return _run_suites(verbose, inline_last)
+    finally:
+        sys.stdout.reconfigure(line_buffering=line_buffering)
+        sys.stdout.flush()
+
+
+def _run_suites(verbose, inline_last):
     print(f"\n{CYAN}{BOLD}  Running Full Test Suite{RESET}")
     print(f"  {'─' * 40}\n")
 
-    suites = [
-        ("Shared (crypto + context)", "AQM_Database/aqm_shared/tests/", False),
-        ("Redis (vault + inventory + gc)", "AQM_Database/aqm_db/tests/", False),
-        ("Server (PostgreSQL + bridge)", "AQM_Database/aqm_server/tests/", True),
-        ("Chat (protocol + session + benchmark)", "AQM_Database/chat/tests/", True),
-    ]
+    # The fakeredis-only suites share no external state, so they all start at
+    # once. The Docker suites share one PostgreSQL test database that every
+    # test TRUNCATEs, so they run one after another (alongside the others).
+    # With inline_last (and no test daemon), the last suite is reported last,
+    # so it runs in this process at its turn.
+    runs = {}
+    inline_label = SUITES[-1][0] if inline_last and not _daemon_running() else None
+    for label, path, needs_docker in SUITES:
+        if not needs_docker and label != inline_label:
+            runs[label] = _start_suite(path, parallel=True, verbose=verbose)
+
+    pg_up = _probe("localhost", 5433)
+    if pg_up:
+        for label, path, needs_docker in SUITES:
+            if needs_docker and label != inline_label:
+                runs[label] = _start_suite(path, parallel=False, verbose=verbose)
+                runs[label][1].wait()
 
-    total_passed = 0
     total_failed = 0
 
-    for label, path, needs_docker in suites:
+    # Report in suite order, each suite's output in one piece
+    for label, path, needs_docker in SUITES:
         print(f"  {BOLD}── {label} ──{RESET}")
-        if needs_docker:
-            if not check_port("localhost", 5433, "PostgreSQL"):
-                warn(f"Skipping {label} — PostgreSQL not available")
-                print()
-                continue
-
-        result = subprocess.run(
-            [sys.executable, "-m", "pytest", path, "-v", "--tb=short"],
-            capture_output=False,
-        )
-
-        if result.returncode == 0:
+        if needs_docker and not _report_port(pg_up, "localhost", 5433, "PostgreSQL"):
+            warn(f"Skipping {label} — PostgreSQL not available")
+            print()
+            sys.stdout.flush()
+            continue
+
+        if label == inline_label:
+            sys.stdout.flush()
+            returncode = _run_suite_inline(path, parallel=not needs_docker, verbose=verbose)
+        else:
+            output, proc = runs[label]
+            returncode = proc.wait()
+            output.seek(0)
+            sys.stdout.flush()
+            sys.stdout.buffer.write(output.read())
+            output.close()
+
+        if returncode == 0:
             ok(f"{label}: all passed")
         else:
-            fail(f"{label}: some tests failed (exit code {result.returncode})")
+            fail(f"{label}: some tests failed (exit code {returncode})")
             total_failed += 1
 
         print()
+        sys.stdout.flush()
 
     return total_failed == 0
 
 
 # ─── Prototype demo ───
 
+def print_crypto_backend():
+    """Report which CryptoEngine backend the demo will use."""
+    from AQM_Database.aqm_shared.crypto_engine import CryptoEngine
+    info(f"Crypto backend: {BOLD}{CryptoEngine().backend}{RESET}")
+    print()
+
+
 def run_demo():
     """Run the 4-phase prototype demo."""
-    import asyncio
-    from AQM_Database.prototype import main
-    asyncio.run(main())
+    from AQM_Database.prototype import run
+    print_crypto_backend()
+    run()
 
 
 # ─── Entry point ───
 
-def parse_args():
+def _build_parser():
     parser = argparse.ArgumentParser(
         description="AQM Prototype Demo Runner",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -182,6 +576,8 @@ examples:
   python demo.py --check      Only run preflight checks
   python demo.py --tests      Run the full test suite
   python demo.py --all        Run tests first, then demo
+  python demo.py --tests --verbose-tests  Show one line per test
+  python demo.py --tests-watch  Keep a warm test daemon for repeated --tests runs
   python demo.py --chat       Run two-user chat demo (all priority scenarios)
   python demo.py --demo-pair  Launch two terminals (default: BESTIE)
   python demo.py --demo-pair --priority MATE      MATE with SILVER ceiling
@@ -192,12 +588,23 @@ examples:
     parser.add_argument("--check", action="store_true", help="Only run preflight checks")
     parser.add_argument("--tests", action="store_true", help="Run the full test suite")
     parser.add_argument("--all", action="store_true", help="Run tests first, then demo")
+    parser.add_argument("--verbose-tests", action="store_true",
+                        help="Per-test output for --tests/--all (default: quiet)")
+    parser.add_argument("--tests-watch", action="store_true",
+                        help="Run a warm pytest daemon that --tests runs are sent to")
     parser.add_argument("--chat", action="store_true", help="Run two-user chat demo (all priorities)")
     parser.add_argument("--demo-pair", action="store_true", help="Launch two terminals for interactive chat")
     parser.add_argument("--priority", choices=["BESTIE", "MATE", "STRANGER"],
                         default="BESTIE", help="Priority for --demo-pair (default: BESTIE)")
     parser.add_argument("--chat-bench", action="store_true", help="Run AQM vs TLS 1.3 benchmark")
-    return parser.parse_args()
+    return parser
+
+
+_PARSER = _build_parser()
+
+
+def parse_args():
+    return _PARSER.parse_args()
 
 
 def main():
@@ -211,20 +618,19 @@ def main():
     """)
 
     if args.check:
-        ok_flag = preflight()
+        ok_flag = preflight(use_cache=False)
         sys.exit(0 if ok_flag else 1)
 
     if args.chat:
-        if not preflight():
+        if not preflight(prefetch="AQM_Database.chat.session"):
             fail("Preflight failed — aborting")
             sys.exit(1)
-        import asyncio
         from AQM_Database.chat.session import run_auto_demo
         asyncio.run(run_auto_demo())
         sys.exit(0)
 
     if args.demo_pair:
-        if not preflight():
+        if not preflight(prefetch="AQM_Database.chat.cli"):
             fail("Preflight failed — aborting")
             sys.exit(1)
         from AQM_Database.chat.cli import launch_demo_pair
@@ -232,24 +638,28 @@ def main():
         sys.exit(0)
 
     if args.chat_bench:
-        if not preflight():
+        if not preflight(prefetch="AQM_Database.chat.benchmark"):
             fail("Preflight failed — aborting")
             sys.exit(1)
-        import asyncio
         from AQM_Database.chat.benchmark import run_benchmark
         asyncio.run(run_benchmark())
         sys.exit(0)
 
+    if args.tests_watch:
+        aqm_test_daemon.serve()
+        sys.exit(0)
+
     if args.tests:
         preflight()
-        ok_flag = run_tests()
+        # Nothing runs after --tests, so the last suite can run in-process
+        ok_flag = run_tests(verbose=args.verbose_tests, inline_last=True)
         sys.exit(0 if ok_flag else 1)
 
     if args.all:
-        if not preflight():
+        if not preflight(prefetch="AQM_Database.prototype"):
             fail("Preflight failed — aborting")
             sys.exit(1)
-        if not run_tests():
+        if not run_tests(verbose=args.verbose_tests):
             fail("Tests failed — aborting demo")
             sys.exit(1)
         print(f"\n{CYAN}{BOLD}  All tests passed — starting demo…{RESET}\n")
@@ -257,7 +667,7 @@ def main():
         sys.exit(0)
 
     # Default: preflight + demo
-    if not preflight():
+    if not preflight(prefetch="AQM_Database.prototype"):
         fail("Preflight failed — fix the issues above first")
         print(f"\n  {DIM}Hint: cd AQM_Database && docker compose up -d{RESET}\n")
         sys.exit(1)
@@ -0,0 +1,108 @@
+"""Tests for aqm_test_daemon — socket permissions, request checks, forked runs."""
+
+import os
+import sys
+import stat
+import time
+import shutil
+import signal
+import socket
+import tempfile
+import subprocess
+import pytest
+
+import aqm_test_daemon
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "send_fds"),
+                                reason="needs socket.send_fds (Python 3.9+, Unix)")
+
+
+@pytest.fixture
+def daemon(monkeypatch):
+    """A daemon serving this checkout on a private socket; yields the socket path."""
+    # AF_UNIX paths are capped near 100 bytes, so stay out of pytest's tmp_path
+    tmp = tempfile.mkdtemp(prefix="aqm-daemon-")
+    path = os.path.join(tmp, "run", "test.sock")
+    proc = subprocess.Popen(
+        [sys.executable, "-c", "import sys, aqm_test_daemon; aqm_test_daemon.serve(sys.argv[1])", path],
+        cwd=ROOT, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while not os.path.exists(path):
+        assert proc.poll() is None, "daemon exited during startup"
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.05)
+    monkeypatch.chdir(ROOT)
+    yield path
+    proc.send_signal(signal.SIGTERM)
+    proc.wait(timeout=10)
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _write_test(body):
+    fd, name = tempfile.mkstemp(prefix="test_aqm_daemon_", suffix=".py")
+    with os.fdopen(fd, "w") as f:
+        f.write(body)
+    return name
+
+
+def test_socket_is_owner_only(daemon):
+    assert stat.S_IMODE(os.stat(daemon).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(os.path.dirname(daemon)).st_mode) == 0o700
+
+
+def test_runs_pytest_with_client_env_and_output(daemon):
+    test_file = _write_test(
+        "import os\n"
+        "def test_env():\n"
+        "    assert os.environ['AQM_DAEMON_PROBE'] == 'yes'\n"
+        "    assert 'AQM_DAEMON_STALE' not in os.environ\n"
+    )
+    env = {k: v for k, v in os.environ.items() if k != "AQM_DAEMON_STALE"}
+    env["AQM_DAEMON_PROBE"] = "yes"
+    try:
+        with tempfile.TemporaryFile() as output:
+            sock = aqm_test_daemon.submit(["-q", "-p", "no:cacheprovider", test_file], env, output, daemon)
+            assert aqm_test_daemon.wait(sock) == 0
+            output.seek(0)
+            assert b"1 passed" in output.read()
+    finally:
+        os.unlink(test_file)
+
+
+def test_reports_failing_exit_code(daemon):
+    test_file = _write_test("def test_fails():\n    assert False\n")
+    try:
+        with tempfile.TemporaryFile() as output:
+            sock = aqm_test_daemon.submit(["-q", "-p", "no:cacheprovider", test_file],
+                                          dict(os.environ), output, daemon)
+            assert aqm_test_daemon.wait(sock) == 1
+    finally:
+        os.unlink(test_file)
+
+
+def test_refuses_other_checkout(daemon, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with tempfile.TemporaryFile() as output:
+        with pytest.raises(aqm_test_daemon.RequestRefused, match="daemon serves"):
+            aqm_test_daemon.submit(["-q"], dict(os.environ), output, daemon)
+
+
+def test_refuses_other_interpreter(daemon, monkeypatch):
+    monkeypatch.setattr(sys, "executable", "/opt/other-venv/bin/python")
+    with tempfile.TemporaryFile() as output:
+        with pytest.raises(aqm_test_daemon.RequestRefused, match="client runs /opt/other-venv"):
+            aqm_test_daemon.submit(["-q"], dict(os.environ), output, daemon)
+
+
+def test_refusal_falls_back_as_oserror():
+    # demo._start_suite falls back to a subprocess on any OSError
+    assert issubclass(aqm_test_daemon.RequestRefused, OSError)
+
+
+def test_submit_without_daemon_raises(tmp_path):
+    with tempfile.TemporaryFile() as output:
+        with pytest.raises(OSError):
+            aqm_test_daemon.submit(["-q"], {}, output, str(tmp_path / "missing.sock"))